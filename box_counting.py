@@ -0,0 +1,154 @@
+"""
+Box-counting estimates of the fractal dimension.
+
+The estimator works directly on the data the generators produce: point sets
+(Koch/Sierpinski vertices from ifs.expand, chaos-game clouds), sampled
+graphs of functions (the weierstrass and takagi curves) and boolean pixel
+masks (e.g. escape_time.boundary_mask of an escape-time render).
+
+Points are snapped to an integer grid of 2**bits cells per axis and encoded
+as Morton (Z-order) codes. Boxes of edge 2**k cells then correspond to the
+codes shifted right by 2*k bits, and since this shift keeps the sorted order,
+a single sort of the finest level gives the box counts of all coarser levels
+in one linear pass each. Large inputs are processed in chunks that are
+deduplicated on the finest level first.
+"""
+# %% IMPORTS
+import numpy as np
+# %% MORTON CODES
+def _spread_bits(v, dtype):
+    """Inserts a zero bit between all bits of integers with up to 16 (uint32)
+    or 32 (uint64) bits."""
+    steps = ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+             (2, 0x3333333333333333), (1, 0x5555555555555555))
+    if dtype == np.uint32:
+        steps = [(shift, mask & 0xFFFFFFFF) for shift, mask in steps[1:]]
+    v = v.astype(dtype)
+    for shift, mask in steps:
+        v = (v | (v << dtype(shift))) & dtype(mask)
+    return v
+
+def morton_codes(ix, iy, bits=32):
+    """Interleaves the bits of two integer coordinate arrays.
+
+    :param int bits: number of bits per coordinate (at most 32); with up to 16
+        bits the codes are computed and returned as uint32
+    :returns ndarray: uint32 or uint64 Z-order codes
+    """
+    dtype = np.uint32 if bits <= 16 else np.uint64
+    return _spread_bits(ix, dtype) | (_spread_bits(iy, dtype) << dtype(1))
+def _sorted_unique(codes):
+    """np.unique for sorted input: drops repeated neighbours in one pass."""
+    return codes[np.r_[True, codes[1:] != codes[:-1]]]
+# %% BOX COUNTING
+def _scales(bits, n_scales):
+    n_scales = bits if n_scales is None else min(n_scales, bits)
+    return np.arange(bits - n_scales + 1, bits + 1)  # coarse -> fine
+
+def _counts_from_codes(codes, bits, n_scales):
+    """Box counts of all scales from the finest-level codes."""
+    codes = _sorted_unique(np.sort(codes))
+    counts = {}
+    for level in range(bits + 1):
+        # boxes of 2**level cells are the codes shifted by 2*level bits, and
+        # the shift keeps the codes sorted:
+        counts[level] = codes.size
+        codes = _sorted_unique(codes >> codes.dtype.type(2))
+    levels = bits - _scales(bits, n_scales)
+    return np.array([counts[level] for level in levels])
+
+def box_counts(points, bits=16, extent=None, n_scales=None, chunk_size=1 << 24):
+    """Counts the occupied boxes of a point set on dyadic scales.
+
+    :param ndarray points: (..., 2) points, e.g., the (n, k, 2) vertices
+        returned by ifs.expand
+    :param int bits: resolution of the finest grid, 2**bits cells per axis
+        (at most 32)
+    :param tuple extent: (x_min, x_max, y_min, y_max) of the square covered by
+        the grid; default: the bounding square of the points
+    :param int n_scales: number of (finest) scales to return; default: all
+    :param int chunk_size: number of points processed at once
+    :returns tuple: (box sizes relative to the extent, number of occupied
+        boxes), ordered from coarse to fine
+    """
+    points = np.asarray(points).reshape(-1, 2)
+    if not len(points):
+        raise ValueError("no points to count")
+    if extent is None:
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        side = max(hi - lo) or 1.0
+        extent = (lo[0], lo[0] + side, lo[1], lo[1] + side)
+    x_min, x_max, y_min, y_max = extent
+    n_cells = 1 << bits
+
+    codes = []
+    for i in range(0, len(points), chunk_size):
+        chunk = points[i:i + chunk_size]
+        ix = np.clip((chunk[:, 0] - x_min) / (x_max - x_min) * n_cells, 0, n_cells - 1)
+        iy = np.clip((chunk[:, 1] - y_min) / (y_max - y_min) * n_cells, 0, n_cells - 1)
+        codes.append(_sorted_unique(np.sort(morton_codes(ix.astype(np.uint32),
+                                                         iy.astype(np.uint32), bits))))
+    counts = _counts_from_codes(np.concatenate(codes), bits, n_scales)
+    return 2.0**-_scales(bits, n_scales), counts
+
+def mask_box_counts(mask, n_scales=None):
+    """Counts the boxes of a boolean pixel mask that contain a True pixel.
+
+    :param ndarray mask: 2D boolean array
+    :returns tuple: (box sizes in pixels, number of occupied boxes), ordered
+        from coarse to fine
+    """
+    rows, cols = np.nonzero(mask)
+    bits = max(1, int(np.ceil(np.log2(max(mask.shape)))))
+    codes = morton_codes(cols, rows, bits)
+    counts = _counts_from_codes(codes, bits, n_scales)
+    return 2.0**(bits - _scales(bits, n_scales)), counts
+
+def curve_box_counts(y, x_range=(0.0, 1.0), n_scales=None):
+    """Counts the boxes covering the graph of a sampled function.
+
+    The graph is regarded as continuous: in every column of boxes it covers
+    all boxes between the minimum and the maximum of the samples in the
+    column (plus the range towards the neighbouring columns). The samples
+    are assumed to be equally spaced over x_range; box sizes are measured in
+    units of x, and the number of samples should be a power of two.
+
+    :param ndarray y: equally spaced samples of the function
+    :param tuple x_range: (x_min, x_max) covered by the samples
+    :param int n_scales: number of (finest) scales to return
+    :returns tuple: (box sizes, number of occupied boxes), ordered from
+        coarse to fine
+    """
+    y = np.asarray(y, dtype=float)
+    bits = int(np.floor(np.log2(len(y))))
+    scales = _scales(bits, n_scales)
+    width = x_range[1] - x_range[0]
+    sizes, counts = [], []
+    for level in scales:
+        n_columns = 1 << level
+        size = width / n_columns
+        edges = np.linspace(0, len(y), n_columns + 1).astype(int)
+        lo = np.minimum.reduceat(y, edges[:-1])
+        hi = np.maximum.reduceat(y, edges[:-1])
+        # connect to the first sample of the next column:
+        nxt = y[np.minimum(edges[1:], len(y) - 1)]
+        lo, hi = np.minimum(lo, nxt), np.maximum(hi, nxt)
+        counts.append(int(np.sum(np.floor(hi / size) - np.floor(lo / size) + 1)))
+        sizes.append(size)
+    return np.array(sizes), np.array(counts)
+# %% DIMENSION
+def dimension(sizes, counts, fit_range=None):
+    """Fits the box-counting dimension, the slope of log N over log(1/s).
+
+    :param ndarray sizes: box sizes
+    :param ndarray counts: numbers of occupied boxes
+    :param tuple fit_range: (s_min, s_max) range of box sizes to fit
+    :returns float: the estimated dimension
+    """
+    sizes, counts = np.asarray(sizes, dtype=float), np.asarray(counts, dtype=float)
+    keep = counts > 0
+    if fit_range is not None:
+        keep &= (sizes >= fit_range[0]) & (sizes <= fit_range[1])
+    slope, _ = np.polyfit(np.log(1 / sizes[keep]), np.log(counts[keep]), 1)
+    return slope
+# %% END
@@ -0,0 +1,92 @@
+"""
+Level-of-detail rendering of rough 1D curves by min/max envelopes.
+
+A curve like the Weierstrass or Takagi function needs far more samples than
+there are pixel columns to be drawn correctly, but a line plot of 10**8
+points is unusable. Here the function is evaluated in streaming chunks, and
+every pixel column is reduced to the minimum and the maximum of its samples
+(in the order in which they occur, as in M4 aggregation). A polyline through
+these 2 points per column covers exactly the pixels the full curve would
+cover, while matplotlib only ever sees about 2*width points and the memory
+use does not depend on the number of samples.
+"""
+# %% IMPORTS
+import numpy as np
+# %% ENVELOPE
+def envelope(func, x_min, x_max, n_samples, n_columns, chunk_size=1 << 20):
+    """Evaluates func on n_samples equally spaced points and reduces them to
+    the min/max envelope of n_columns columns.
+
+    :param callable func: vectorized function of x
+    :param float x_min: first sample
+    :param float x_max: last sample
+    :param int n_samples: number of samples
+    :param int n_columns: number of (pixel) columns
+    :param int chunk_size: number of samples evaluated at once
+    :returns tuple: (x, y) arrays of 2*n_columns points (fewer if a column
+        has no samples), with the extrema of each column in sample order
+    """
+    dx = (x_max - x_min) / max(n_samples - 1, 1)
+    y_lo = np.full(n_columns, np.inf)
+    y_hi = np.full(n_columns, -np.inf)
+    i_lo = np.zeros(n_columns, dtype=np.int64)
+    i_hi = np.zeros(n_columns, dtype=np.int64)
+
+    for start in range(0, n_samples, chunk_size):
+        idx = np.arange(start, min(start + chunk_size, n_samples), dtype=np.int64)
+        y = np.asarray(func(x_min + idx * dx), dtype=float)
+        col = idx * n_columns // n_samples  # samples are sorted, so are columns
+
+        # reduce each column of the chunk (columns are contiguous runs):
+        bounds = np.flatnonzero(np.r_[True, col[1:] != col[:-1]])
+        cols = col[bounds]
+        lo = np.minimum.reduceat(y, bounds)
+        hi = np.maximum.reduceat(y, bounds)
+        # first sample that attains the extremum:
+        big = np.iinfo(np.int64).max
+        run = np.repeat(np.arange(len(bounds)), np.diff(np.r_[bounds, len(y)]))
+        pos_lo = np.minimum.reduceat(np.where(y == lo[run], idx, big), bounds)
+        pos_hi = np.minimum.reduceat(np.where(y == hi[run], idx, big), bounds)
+
+        # merge with the columns seen in earlier chunks:
+        lower = lo < y_lo[cols]
+        y_lo[cols[lower]], i_lo[cols[lower]] = lo[lower], pos_lo[lower]
+        higher = hi > y_hi[cols]
+        y_hi[cols[higher]], i_hi[cols[higher]] = hi[higher], pos_hi[higher]
+
+    filled = np.isfinite(y_lo)
+    i = np.stack([i_lo[filled], i_hi[filled]], axis=1)
+    v = np.stack([y_lo[filled], y_hi[filled]], axis=1)
+    order = np.argsort(i, axis=1, kind="stable")
+    i = np.take_along_axis(i, order, axis=1).ravel()
+    v = np.take_along_axis(v, order, axis=1).ravel()
+    return x_min + i * dx, v
+
+def pixel_columns(ax, dpi=None):
+    """Number of pixel columns of an axes when the figure is drawn at dpi.
+
+    :param ax: matplotlib axes
+    :param float dpi: output resolution (default: the figure dpi)
+    :returns int: width of the axes in pixels
+    """
+    fig = ax.get_figure()
+    dpi = fig.dpi if dpi is None else dpi
+    return max(1, int(np.ceil(ax.get_position().width * fig.get_figwidth() * dpi)))
+
+def plot_envelope(ax, func, x_min, x_max, n_samples, dpi=None, line=None, **kwargs):
+    """Plots the min/max envelope of func at the resolution of the axes.
+
+    :param ax: matplotlib axes
+    :param callable func: vectorized function of x
+    :param int n_samples: number of samples of func
+    :param float dpi: output resolution used to count the pixel columns
+    :param line: an existing Line2D to update instead of plotting a new one
+    :returns Line2D: the line
+    """
+    x, y = envelope(func, x_min, x_max, n_samples, pixel_columns(ax, dpi))
+    if line is None:
+        line, = ax.plot(x, y, **kwargs)
+    else:
+        line.set_data(x, y)
+    return line
+# %% END
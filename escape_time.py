@@ -0,0 +1,710 @@
+"""
+Vectorized escape-time kernels for the Mandelbrot and Julia sets.
+
+All renderers in this module return an array of escape counts with shape
+(height, width), where row 0 corresponds to y_min (i.e., use imshow with
+origin='lower' to get the mathematical orientation). A point counts the
+number of iterations n for which |z_n| < bailout, capped at max_iter. For
+the Mandelbrot set, z_0 = 0 and c is the point; for a Julia set, z_0 is the
+point and c is fixed.
+"""
+# %% IMPORTS
+import warnings
+from decimal import Decimal, localcontext
+
+import numpy as np
+# %% ESCAPE-TIME KERNEL
+def escape_time(zx, zy, cx, cy, max_iter, bailout=2.0, dtype=np.float64):
+    """Iterates z -> z**2 + c on arrays and returns the escape counts.
+
+    Real and imaginary parts are kept in separate arrays of the given dtype,
+    and the squared magnitude is compared against bailout**2, so the hot
+    loop needs no square root. Escaped points are removed from the working
+    arrays, so that the remaining iterations only touch the bounded points.
+
+    :param ndarray zx: real parts of the starting values z_0
+    :param ndarray zy: imaginary parts of the starting values z_0
+    :param ndarray cx: real parts of the constants c (broadcast against z)
+    :param ndarray cy: imaginary parts of the constants c
+    :param int max_iter: the maximum number of iterations
+    :param float bailout: escape radius
+    :param dtype: np.float32 or np.float64
+    :returns ndarray: integer escape counts with the broadcast shape of z and c
+    """
+    zx, zy, cx, cy = np.broadcast_arrays(zx, zy, cx, cy)
+    shape = zx.shape
+    zx, zy, cx, cy = (np.array(a, dtype=dtype).ravel() for a in (zx, zy, cx, cy))
+    counts, _, _ = _iterate(zx, zy, cx, cy, 0, max_iter, dtype(bailout)**2)
+    return counts.reshape(shape)
+
+def _iterate(zx, zy, cx, cy, start, stop, bailout2):
+    """Continues the iteration of 1D arrays from iteration 'start' to 'stop'.
+
+    :returns tuple: (counts, zx, zy), where counts is 'stop' for the points
+        that did not escape, and zx, zy hold their z_stop (for resuming)
+    """
+    counts = np.full(zx.size, stop, dtype=int)
+    idx = np.arange(zx.size)
+    zx_out, zy_out = zx.copy(), zy.copy()
+
+    for i in range(start, stop):
+        zx2 = zx * zx
+        zy2 = zy * zy
+        escaped = zx2 + zy2 >= bailout2
+        if escaped.any():
+            counts[idx[escaped]] = i
+            bounded = ~escaped
+            idx, zx, zy, cx, cy = idx[bounded], zx[bounded], zy[bounded], cx[bounded], cy[bounded]
+            zx2, zy2 = zx2[bounded], zy2[bounded]
+            if idx.size == 0:
+                break
+        zy = 2 * zx * zy + cy
+        zx = zx2 - zy2 + cx
+
+    zx_out[idx], zy_out[idx] = zx, zy
+    return counts, zx_out, zy_out
+
+def evaluate(x, y, max_iter, c=None, bailout=2.0, dtype=np.float64):
+    """Escape counts at the points x + i*y.
+
+    :param ndarray x: real parts of the points
+    :param ndarray y: imaginary parts of the points
+    :param int max_iter: the maximum number of iterations
+    :param complex c: the Julia constant; None for the Mandelbrot set
+    :param float bailout: escape radius
+    :param dtype: np.float32 or np.float64
+    :returns ndarray: integer escape counts
+    """
+    if c is None:
+        return escape_time(0, 0, x, y, max_iter, bailout, dtype)
+    return escape_time(x, y, c.real, c.imag, max_iter, bailout, dtype)
+
+def grid(x_min, x_max, y_min, y_max, width, height, dtype=np.float64):
+    """Pixel coordinates of a viewport (first and last pixel on the edges).
+
+    :returns tuple: (x, y) 1D arrays of length width and height
+    """
+    return (np.linspace(float(x_min), float(x_max), width, dtype=dtype),
+            np.linspace(float(y_min), float(y_max), height, dtype=dtype))
+# %% PRECISION
+_PRECISION_ULPS = 256  # a pixel step must span at least this many ulps
+
+def _exact_precision(*values):
+    """Decimal precision at which sums and differences of the values are
+    exact (the default context keeps only 28 digits)."""
+    values = [Decimal(v) for v in values]
+    top = max(v.adjusted() for v in values)
+    bottom = min(v.as_tuple().exponent for v in values)
+    return max(28, top - bottom + 3)
+
+def select_precision(x_min, x_max, y_min, y_max, width, height, bailout=2.0):
+    """Picks the cheapest arithmetic that resolves the pixel spacing.
+
+    float32 is used as long as a pixel step is large compared to the float32
+    resolution at the magnitude of the iterates (the shallow views of all
+    animations), float64 for moderate zooms, and perturbation around a high
+    precision reference orbit beyond that. Coordinates may be given as
+    decimal.Decimal for zooms deeper than float64 can express.
+
+    :returns str: 'float32', 'float64' or 'perturbation'
+    """
+    with localcontext() as ctx:
+        ctx.prec = _exact_precision(x_min, x_max, y_min, y_max)
+        spacing = min(float(Decimal(x_max) - Decimal(x_min)) / max(width - 1, 1),
+                      float(Decimal(y_max) - Decimal(y_min)) / max(height - 1, 1))
+    scale = max(abs(float(v)) for v in (x_min, x_max, y_min, y_max, bailout))
+    for precision, dtype in (("float32", np.float32), ("float64", np.float64)):
+        if spacing >= scale * np.finfo(dtype).eps * _PRECISION_ULPS:
+            return precision
+    return "perturbation"
+
+def _float_dtype(precision, auto=False):
+    """dtype of a precision for the renderers that have no perturbation path;
+    'auto' tells whether the precision was selected by select_precision."""
+    if precision == "perturbation":
+        if not auto:
+            raise ValueError("precision 'perturbation' is only supported by render()")
+        warnings.warn("the pixel spacing is below the float64 resolution, but this "
+                      "renderer has no perturbation path; rendering in float64",
+                      RuntimeWarning)
+        return np.float64
+    if precision not in ("float32", "float64"):
+        raise ValueError(f"unknown precision {precision!r}")
+    return np.float32 if precision == "float32" else np.float64
+
+def _dtype(precision, x_min, x_max, y_min, y_max, width, height, bailout):
+    if precision == "auto":
+        precision = select_precision(x_min, x_max, y_min, y_max, width, height, bailout)
+        return _float_dtype(precision, auto=True)
+    return _float_dtype(precision)
+
+def _reference_orbit(z0, c, max_iter, bailout, digits):
+    """Orbit of the reference point in decimal arithmetic, rounded to float64."""
+    with localcontext() as ctx:
+        ctx.prec = digits
+        zx, zy = z0
+        cx, cy = c
+        orbit = [(float(zx), float(zy))]
+        for _ in range(max_iter):
+            zx, zy = zx * zx - zy * zy + cx, 2 * zx * zy + cy
+            orbit.append((float(zx), float(zy)))
+            if orbit[-1][0]**2 + orbit[-1][1]**2 >= bailout**2:
+                break
+    return np.array(orbit)
+
+def render_perturbation(x_min, x_max, y_min, y_max, width, height, max_iter, c=None,
+                        bailout=2.0):
+    """Deep-zoom render by perturbation around the orbit of the viewport center.
+
+    The center orbit Z_n is computed once in decimal arithmetic; every pixel
+    only iterates its float64 offset d_n from it, d -> 2*Z*d + d**2 + dc,
+    which stays accurate where the pixel coordinates themselves no longer
+    fit into float64. When |z| becomes smaller than |d| (or the reference
+    orbit ends), the pixel is rebased onto the start of the reference orbit.
+
+    :returns ndarray: (height, width) integer escape counts
+    """
+    x_min, x_max, y_min, y_max = (Decimal(v) for v in (x_min, x_max, y_min, y_max))
+    with localcontext() as ctx:
+        ctx.prec = _exact_precision(x_min, x_max, y_min, y_max)
+        center = ((x_min + x_max) / 2, (y_min + y_max) / 2)
+        x_span, y_span = float(x_max - x_min), float(y_max - y_min)
+    digits = 20 + int(-np.log10(min(x_span, y_span)))
+    if c is None:
+        orbit = _reference_orbit((Decimal(0), Decimal(0)), center, max_iter, bailout, digits)
+    else:
+        c = complex(c)
+        orbit = _reference_orbit(center, (Decimal(c.real), Decimal(c.imag)), max_iter,
+                                 bailout, digits)
+
+    # pixel offsets from the center:
+    ox = (np.arange(width) - (width - 1) / 2) * (x_span / max(width - 1, 1))
+    oy = (np.arange(height) - (height - 1) / 2) * (y_span / max(height - 1, 1))
+    OX, OY = (a.ravel() for a in np.meshgrid(ox, oy))
+    if c is None:
+        dcx, dcy = OX, OY
+        dx, dy = np.zeros_like(OX), np.zeros_like(OY)
+    else:
+        dcx = dcy = 0.0
+        dx, dy = OX.copy(), OY.copy()
+
+    counts = np.full(OX.size, max_iter, dtype=int)
+    idx = np.arange(OX.size)
+    m = np.zeros(OX.size, dtype=int)
+    last = len(orbit) - 1
+    bailout2 = bailout**2
+    for i in range(max_iter):
+        Zx, Zy = orbit[m, 0], orbit[m, 1]
+        zx, zy = Zx + dx, Zy + dy
+        escaped = zx * zx + zy * zy >= bailout2
+        if escaped.any():
+            counts[idx[escaped]] = i
+            keep = ~escaped
+            idx, m, dx, dy, zx, zy, Zx, Zy = (a[keep] for a in (idx, m, dx, dy, zx, zy, Zx, Zy))
+            if c is None:
+                dcx, dcy = dcx[keep], dcy[keep]
+            if idx.size == 0:
+                break
+
+        # rebase onto the start of the reference orbit:
+        rx, ry = zx - orbit[0, 0], zy - orbit[0, 1]
+        rebase = (rx * rx + ry * ry < dx * dx + dy * dy) | (m == last)
+        if rebase.any():
+            dx[rebase], dy[rebase] = rx[rebase], ry[rebase]
+            m[rebase] = 0
+            Zx[rebase], Zy[rebase] = orbit[0, 0], orbit[0, 1]
+
+        dx, dy = (2 * (Zx * dx - Zy * dy) + dx * dx - dy * dy + dcx,
+                  2 * (Zx * dy + Zy * dx) + 2 * dx * dy + dcy)
+        m += 1
+
+    return counts.reshape(height, width)
+# %% SYMMETRY
+def _mirror_index(v_min, v_max, n):
+    """Index sum S with v[k] = -v[S - k] on the pixel grid, or None if the
+    grid is not aligned with its own mirror image."""
+    if n < 2 or v_max <= v_min:
+        return None
+    s = -2 * float(v_min) / ((float(v_max) - float(v_min)) / (n - 1))
+    if abs(s - round(s)) > 1e-6 or not 0 <= round(s) <= 2 * (n - 1):
+        return None
+    return int(round(s))
+
+def _mirrored_range(s, n):
+    """Half-open range [k0, k1) of the indices k that are mirror images of
+    s - k < k on an axis of n pixels, or None."""
+    if s is None:
+        return None
+    k0, k1 = s // 2 + 1, min(s, n - 1) + 1
+    return (k0, k1) if k0 < k1 else None
+
+def symmetry_plan(x_min, x_max, y_min, y_max, width, height, c=None):
+    """Splits a viewport into the rectangles that have to be computed and the
+    mirrored slices that can be copied from them.
+
+    The Mandelbrot set is symmetric about the real axis, quadratic Julia sets
+    are symmetric under z -> -z, and Julia sets of a real c are symmetric
+    about both axes. Mirrored pixels only count as symmetric if the pixel
+    grid is aligned with its mirror image.
+
+    :returns tuple: (boxes, copies), where boxes is a list of inclusive
+        (r0, r1, c0, c1) rectangles to compute, and copies a list of
+        (target, source, axes) slices to apply in order, as
+        img[target] = np.flip(img[source], axes)
+    """
+    sx = _mirror_index(x_min, x_max, width)
+    sy = _mirror_index(y_min, y_max, height)
+    real = c is None or complex(c).imag == 0
+    rows = _mirrored_range(sy, height)
+    cols = _mirrored_range(sx, width) if c is not None else None
+    everything = slice(None)
+
+    def source(k0, k1, s):
+        return slice(s - k1 + 1, s - k0 + 1)
+
+    if real:
+        # conjugation (y -> -y) for the Mandelbrot set, and both mirrors for
+        # the Julia set of a real c:
+        keep_rows = [(0, rows[0]), (rows[1], height)] if rows else [(0, height)]
+        keep_cols = [(0, cols[0]), (cols[1], width)] if cols else [(0, width)]
+        boxes = [(r0, r1 - 1, c0, c1 - 1) for r0, r1 in keep_rows if r1 > r0
+                 for c0, c1 in keep_cols if c1 > c0]
+        copies = []
+        if cols:
+            copies += [((slice(r0, r1), slice(*cols)), (slice(r0, r1), source(*cols, sx)), 1)
+                       for r0, r1 in keep_rows if r1 > r0]
+        if rows:
+            copies.append(((slice(*rows), everything), (source(*rows, sy), everything), 0))
+        return boxes, copies
+
+    # z -> -z for a complex c: the lower rows of the mirrored range are copied
+    # from the upper rows, as far as their mirrored columns exist:
+    if rows is None or sx is None:
+        return [(0, height - 1, 0, width - 1)], []
+    c0, c1 = max(sx - width + 1, 0), min(sx, width - 1) + 1
+    if c0 >= c1:
+        return [(0, height - 1, 0, width - 1)], []
+    boxes = [(0, rows[0] - 1, 0, width - 1)]
+    if rows[1] < height:
+        boxes.append((rows[1], height - 1, 0, width - 1))
+    if c0 > 0:
+        boxes.append((rows[0], rows[1] - 1, 0, c0 - 1))
+    if c1 < width:
+        boxes.append((rows[0], rows[1] - 1, c1, width - 1))
+    copies = [((slice(*rows), slice(c0, c1)), (source(*rows, sy), source(c0, c1, sx)), (0, 1))]
+    return boxes, copies
+
+def _render_symmetric(render_box, x_min, x_max, y_min, y_max, width, height, c, symmetry,
+                      dtype=float):
+    """Renders only the unique part of a viewport and mirrors the rest.
+
+    :param render_box: callable(r0, r1, c0, c1) returning the rendered pixels
+        rows r0..r1 and columns c0..c1 (inclusive)
+    :returns ndarray: the (height, width) image
+    """
+    if symmetry:
+        boxes, copies = symmetry_plan(x_min, x_max, y_min, y_max, width, height, c)
+    if not symmetry or not copies:
+        return render_box(0, height - 1, 0, width - 1)
+    img = np.empty((height, width), dtype=dtype)
+    for r0, r1, c0, c1 in boxes:
+        img[r0:r1 + 1, c0:c1 + 1] = render_box(r0, r1, c0, c1)
+    for target, source, axes in copies:
+        img[target] = np.flip(img[source], axes)
+    return img
+# %% RENDERERS
+def render(x_min, x_max, y_min, y_max, width, height, max_iter, c=None, bailout=2.0,
+           precision="auto", symmetry=True):
+    """Brute-force render of a viewport, one sample per pixel.
+
+    :param str precision: 'float32', 'float64', 'perturbation' or 'auto'
+        (see select_precision)
+    :param bool symmetry: compute only the unique part of symmetric viewports
+        (see symmetry_plan)
+    :returns ndarray: (height, width) integer escape counts
+    """
+    if precision == "auto":
+        precision = select_precision(x_min, x_max, y_min, y_max, width, height, bailout)
+    if precision == "perturbation":
+        return render_perturbation(x_min, x_max, y_min, y_max, width, height, max_iter,
+                                   c, bailout)
+    dtype = _float_dtype(precision)
+    x, y = grid(x_min, x_max, y_min, y_max, width, height, dtype)
+
+    def render_box(r0, r1, c0, c1):
+        X, Y = np.meshgrid(x[c0:c1 + 1], y[r0:r1 + 1])
+        return evaluate(X, Y, max_iter, c, bailout, dtype)
+
+    return _render_symmetric(render_box, x_min, x_max, y_min, y_max, width, height, c,
+                             symmetry, int)
+
+def boundary_mask(counts):
+    """Marks the pixels whose count differs from any of their 8 neighbours.
+
+    :param ndarray counts: (height, width) escape counts
+    :returns ndarray: boolean mask of the same shape
+    """
+    padded = np.pad(counts, 1, mode="edge")
+    h, w = counts.shape
+    mask = np.zeros(counts.shape, dtype=bool)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy == 1 and dx == 1:
+                continue
+            mask |= padded[dy:dy + h, dx:dx + w] != counts
+    return mask
+
+def render_antialiased(x_min, x_max, y_min, y_max, width, height, max_iter, c=None,
+                       bailout=2.0, samples=8, seed=None, precision="auto", symmetry=True):
+    """Render with adaptive supersampling of the set boundary.
+
+    The viewport is rendered at base resolution first. Only pixels whose
+    count differs from one of their neighbours are supersampled with
+    'samples' jittered sub-samples inside the pixel, and their value becomes
+    the mean count over the center and all sub-samples. Interior and
+    smooth exterior regions (the majority of the frame) cost a single sample.
+
+    :param int samples: number of jittered sub-samples per boundary pixel
+    :param int seed: seed of the jitter
+    :param str precision: 'float32', 'float64' or 'auto' (float64, with a
+        RuntimeWarning, where render() would use perturbation)
+    :param bool symmetry: compute only the unique part of symmetric viewports
+    :returns ndarray: (height, width) float array of (mean) escape counts
+    """
+    dtype = _dtype(precision, x_min, x_max, y_min, y_max, width, height, bailout)
+    x, y = grid(x_min, x_max, y_min, y_max, width, height, dtype)
+    dx = (x_max - x_min) / max(width - 1, 1)
+    dy = (y_max - y_min) / max(height - 1, 1)
+    rng = np.random.default_rng(seed)
+
+    def render_box(r0, r1, c0, c1):
+        bx, by = x[c0:c1 + 1], y[r0:r1 + 1]
+        X, Y = np.meshgrid(bx, by)
+        counts = evaluate(X, Y, max_iter, c, bailout, dtype)
+        img = counts.astype(float)
+        if samples < 1:
+            return img
+        rows, cols = np.nonzero(boundary_mask(counts))
+        jitter = rng.uniform(-0.5, 0.5, size=(2, len(rows), samples))
+        sx = bx[cols][:, None] + jitter[0] * dx
+        sy = by[rows][:, None] + jitter[1] * dy
+        sub = evaluate(sx, sy, max_iter, c, bailout, dtype)
+        img[rows, cols] = (counts[rows, cols] + sub.sum(axis=1)) / (samples + 1)
+        return img
+
+    return _render_symmetric(render_box, x_min, x_max, y_min, y_max, width, height, c,
+                             symmetry, float)
+
+def _ranges(starts, lengths, step=1):
+    """Concatenation of np.arange(s, s + step * n, step) over all starts s
+    and lengths n."""
+    lengths = np.asarray(lengths)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + step * (np.arange(lengths.sum()) - offsets)
+
+def _rect_borders(rects, width):
+    """Flat pixel indices of the borders of rectangles (y0, y1, x0, x1): the
+    top rows, the bottom rows, the inner left and the inner right columns of
+    all rectangles, one after the other; returns the indices and the starts
+    of the 4 * len(rects) groups."""
+    y0, y1, x0, x1 = rects.T
+    nx, ny = x1 - x0 + 1, np.maximum(y1 - y0 - 1, 0)
+    n = np.concatenate([nx, nx, ny, ny])
+    idx = np.concatenate([_ranges(y0 * width + x0, nx), _ranges(y1 * width + x0, nx),
+                          _ranges((y0 + 1) * width + x0, ny, width),
+                          _ranges((y0 + 1) * width + x1, ny, width)])
+    return idx, np.cumsum(n) - n
+
+def _rect_interiors(rects, width, step=1):
+    """Flat pixel indices of every step-th inner row and column of rectangles,
+    grouped by rectangle; returns the indices and the group starts."""
+    y0, y1, x0, x1 = rects.T
+    ny, nx = -(-(y1 - y0 - 1) // step), -(-(x1 - x0 - 1) // step)
+    rows = _ranges(y0 + 1, ny, step)
+    owner = np.repeat(np.arange(len(rects)), ny)
+    cols = _ranges(x0[owner] + 1, nx[owner], step)
+    n = nx * ny
+    return np.repeat(rows, nx[owner]) * width + cols, np.cumsum(n) - n
+
+def _mariani_silver(x, y, max_iter, c, bailout, dtype, block, min_size, confirm):
+    """Mariani-Silver subdivision on the pixel grid x, y; returns the counts
+    and the number of iterated pixels."""
+    height, width = len(y), len(x)
+    counts = np.zeros(height * width, dtype=int)
+    known = np.zeros(height * width, dtype=bool)
+    n_iterated = 0
+
+    def compute(idx):
+        nonlocal n_iterated
+        new = np.zeros(known.size, dtype=bool)
+        new[idx] = True  # (neighbours share their borders)
+        idx = np.flatnonzero(new & ~known)
+        counts[idx] = evaluate(x[idx % width], y[idx // width], max_iter, c, bailout, dtype)
+        known[idx] = True
+        n_iterated += len(idx)
+
+    def uniform(idx, starts):
+        # (groups are never empty, as thin rectangles are done separately)
+        values = counts[idx]
+        lo = np.minimum.reduceat(values, starts).reshape(4, -1).min(axis=0)
+        return lo == np.maximum.reduceat(values, starts).reshape(4, -1).max(axis=0), lo
+
+    # rectangles as rows of inclusive pixel bounds (y0, y1, x0, x1):
+    ys = np.unique(np.r_[0:height - 1:block, height - 1])
+    xs = np.unique(np.r_[0:width - 1:block, width - 1])
+    if len(ys) < 2 or len(xs) < 2:
+        rects = np.array([[0, height - 1, 0, width - 1]])  # a single row or column
+    else:
+        Y0, X0 = np.meshgrid(np.arange(len(ys) - 1), np.arange(len(xs) - 1), indexing="ij")
+        rects = np.stack([ys[Y0], ys[Y0 + 1], xs[X0], xs[X0 + 1]], axis=-1).reshape(-1, 4)
+    fills, fill_values = [], []
+    while len(rects):
+        thin = (rects[:, 1] - rects[:, 0] < 2) | (rects[:, 3] - rects[:, 2] < 2)
+        if thin.any():
+            compute(_rect_borders(rects[thin], width)[0])
+            rects = rects[~thin]
+            if not len(rects):
+                break
+        idx, starts = _rect_borders(rects, width)
+        compute(idx)
+        same, value = uniform(idx, starts)
+
+        # a border that never escapes can enclose escaping pixels that are
+        # thinner than the pixel spacing, when it runs close to the boundary
+        # of the set. Such filaments enter from a neighbour that contains
+        # escaping pixels, so rectangles next to non-uniform ones are
+        # subdivided rather than filled:
+        suspect = same & (value == max_iter)
+        if suspect.any():
+            rough = np.zeros(height * width, dtype=bool)
+            rough[idx[np.repeat(np.tile(~same, 4), np.diff(np.r_[starts, len(idx)]))]] = True
+            idx, starts = _rect_borders(rects[suspect], width)
+            touches = np.maximum.reduceat(rough[idx], starts).reshape(4, -1).any(axis=0)
+            same[np.flatnonzero(suspect)] = ~touches
+            suspect &= same
+        # and the remaining ones are only trusted if they also stay bounded
+        # for 'confirm' times as many iterations:
+        if confirm > 1 and suspect.any():
+            idx, starts = _rect_borders(rects[suspect], width)
+            deep = evaluate(x[idx % width], y[idx // width], confirm * max_iter, c, bailout, dtype)
+            n_iterated += len(idx)
+            deep = np.minimum.reduceat(deep, starts).reshape(4, -1).min(axis=0)
+            same[np.flatnonzero(suspect)] = deep == confirm * max_iter
+        fills.append(rects[same])
+        fill_values.append(value[same])
+
+        rects = rects[~same]
+        small = np.minimum(rects[:, 1] - rects[:, 0], rects[:, 3] - rects[:, 2]) - 1 <= min_size
+        if small.any():
+            compute(_rect_interiors(rects[small], width)[0])
+        y0, y1, x0, x1 = rects[~small].T
+        ym, xm = (y0 + y1) // 2, (x0 + x1) // 2
+        rects = np.concatenate([np.stack(q, axis=1) for q in
+                                ((y0, ym, x0, xm), (y0, ym, xm, x1),
+                                 (ym, y1, x0, xm), (ym, y1, xm, x1))])
+
+    # fill the inside of the uniform rectangles (their insides are disjoint)
+    # at once with a 2D prefix sum of their corner values:
+    if fills:
+        y0, y1, x0, x1 = np.concatenate(fills).T
+        value = np.concatenate(fill_values)
+        corners = np.concatenate([(y0 + 1) * (width + 1) + x0 + 1, (y0 + 1) * (width + 1) + x1,
+                                  y1 * (width + 1) + x0 + 1, y1 * (width + 1) + x1])
+        weights = np.concatenate([value, -value, -value, value])
+        filled = np.bincount(corners, weights, (height + 1) * (width + 1))
+        filled = filled.reshape(height + 1, width + 1).cumsum(axis=0).cumsum(axis=1)
+        counts[~known] = filled[:height, :width].ravel()[~known].astype(int)
+    return counts.reshape(height, width), n_iterated
+
+def render_mariani_silver(x_min, x_max, y_min, y_max, width, height, max_iter, c=None,
+                          bailout=2.0, block=64, min_size=4, confirm=4, verify=False,
+                          precision="auto", symmetry=True):
+    """Render by Mariani-Silver rectangle subdivision ("solid guessing").
+
+    The frame is first tiled into blocks of at most 'block' pixels (so that a
+    uniform frame border cannot hide the whole set), and for each rectangle
+    only its border is iterated. If all border pixels have the same count,
+    the inside is filled with that count without further work; otherwise
+    the rectangle is split into four quadrants that share their middle
+    lines. Rectangles with at most 'min_size' inner rows or columns are
+    iterated completely. All rectangles of one subdivision level are
+    handled together: their borders are evaluated in a single call of the
+    vectorized kernel and the bookkeeping works on arrays of rectangles.
+
+    The result is a guess, not an exact render: escaping filaments thinner
+    than the pixel spacing can cross a border between two samples, most
+    often near the pinch points of the set, where the border counts are
+    max_iter. Such borders are therefore only trusted if no neighbouring
+    rectangle contains escaping pixels, and if they also stay bounded for
+    'confirm' times as many iterations. On the zoom of mandelbrot_set.py
+    this leaves 2 wrong pixels in 82 frames (isolated points that escape
+    just below max_iter); 'verify' replaces such pixels by brute force.
+
+    Every subdivision level runs the kernel loop once more over the border
+    pixels, which lie mostly close to the set, so this only pays off when
+    large areas are bounded (deep zooms at high max_iter); shallow frames
+    are faster with render().
+
+    :param int block: edge length of the initial tiles in pixels
+    :param int min_size: inner size below which a rectangle is not subdivided
+    :param int confirm: iteration factor for the check of max_iter borders
+        (1 disables the check)
+    :param bool verify: also do a brute-force render, replace the pixels that
+        differ from it and report them with a RuntimeWarning
+    :param str precision: 'float32', 'float64' or 'auto' (float64, with a
+        RuntimeWarning, where render() would use perturbation)
+    :param bool symmetry: compute only the unique part of symmetric viewports
+    :returns tuple: ((height, width) integer escape counts, fraction of the
+        pixels that were actually iterated)
+    """
+    dtype = _dtype(precision, x_min, x_max, y_min, y_max, width, height, bailout)
+    x, y = grid(x_min, x_max, y_min, y_max, width, height, dtype)
+    n_iterated = 0
+
+    def render_box(r0, r1, c0, c1):
+        nonlocal n_iterated
+        counts, n = _mariani_silver(x[c0:c1 + 1], y[r0:r1 + 1], max_iter, c, bailout, dtype,
+                                    block, min_size, confirm)
+        n_iterated += n
+        return counts
+
+    counts = _render_symmetric(render_box, x_min, x_max, y_min, y_max, width, height, c,
+                               symmetry, int)
+
+    if verify:
+        reference = render(x_min, x_max, y_min, y_max, width, height, max_iter, c, bailout,
+                           "float32" if dtype == np.float32 else "float64", symmetry)
+        rows, cols = np.nonzero(reference != counts)
+        if len(rows):
+            warnings.warn(f"Mariani-Silver render differed from the brute-force render in "
+                          f"{len(rows)} pixels (rows {rows.min()}-{rows.max()}, columns "
+                          f"{cols.min()}-{cols.max()}), which were replaced", RuntimeWarning)
+            counts = reference
+    return counts, n_iterated / counts.size
+# %% PROGRESSIVE REFINEMENT
+def render_progressive(x_min, x_max, y_min, y_max, width, height, max_iter, c=None,
+                       bailout=2.0, block=16, start_iter=None, precision="auto"):
+    """Renders a viewport in successively better previews.
+
+    First one sample per block of block x block pixels is computed and
+    the blocks are filled with it; every further pass halves the block size
+    and only computes the samples that are new on the finer lattice (as in
+    interlaced images), until every pixel has its own sample. These passes
+    use a low iteration cap, which is then doubled until max_iter is
+    reached, continuing the points that were still bounded from their
+    stored z instead of starting over. No sample is ever computed twice,
+    and the last image equals render(..., symmetry=False).
+
+    :param int block: edge length of the coarsest blocks (a power of two)
+    :param int start_iter: iteration cap of the spatial passes (default:
+        max_iter // 8)
+    :param str precision: 'float32', 'float64' or 'auto' (float64, with a
+        RuntimeWarning, where render() would use perturbation)
+    :returns generator: yields (counts, block size, iteration cap) tuples,
+        where counts is a (height, width) integer array
+    """
+    dtype = _dtype(precision, x_min, x_max, y_min, y_max, width, height, bailout)
+    x, y = grid(x_min, x_max, y_min, y_max, width, height, dtype)
+    X, Y = np.meshgrid(x, y)
+    if c is None:
+        zx0, zy0 = np.zeros_like(X), np.zeros_like(Y)
+        cx, cy = X, Y
+    else:
+        zx0, zy0 = X, Y
+        cx, cy = np.full_like(X, complex(c).real), np.full_like(Y, complex(c).imag)
+    bailout2 = dtype(bailout)**2
+    cap = min(max_iter, max(1, max_iter // 8) if start_iter is None else start_iter)
+
+    counts = np.zeros((height, width), dtype=int)
+    zx, zy = zx0.copy(), zy0.copy()  # z at 'cap' for the bounded points
+    known = np.zeros((height, width), dtype=bool)
+
+    # spatial passes on finer and finer lattices:
+    rows, cols = np.arange(height), np.arange(width)
+    step = max(1, block)
+    while True:
+        lattice = np.zeros((height, width), dtype=bool)
+        lattice[::step, ::step] = True
+        r, q = np.nonzero(lattice & ~known)
+        counts[r, q], zx[r, q], zy[r, q] = _iterate(zx0[r, q], zy0[r, q], cx[r, q], cy[r, q],
+                                                    0, cap, bailout2)
+        known |= lattice
+        yield counts[(rows // step * step)[:, None], cols // step * step], step, cap
+        if step == 1:
+            break
+        step //= 2
+
+    # iteration passes, resuming the bounded points:
+    while cap < max_iter:
+        new_cap = min(2 * cap, max_iter)
+        r, q = np.nonzero(counts == cap)
+        counts[r, q], zx[r, q], zy[r, q] = _iterate(zx[r, q], zy[r, q], cx[r, q], cy[r, q],
+                                                    cap, new_cap, bailout2)
+        cap = new_cap
+        yield counts.copy(), 1, cap
+# %% PARAMETER SWEEPS
+def iter_julia_sweep(c_values, viewports, width, height, max_iter, bailout=2.0,
+                     precision="auto", chunk_size=1 << 16):
+    """Evaluates the Julia sets of many c values on several viewports.
+
+    The pixel grids of all viewports are built once and reused for every c.
+    The (n_c, n_views, height, width) points are evaluated in flat chunks of
+    'chunk_size' points, i.e., small frames of several c values share one
+    call of the vectorized kernel, and large frames are split into chunks
+    whose working arrays stay in the CPU cache.
+
+    :param ndarray c_values: the Julia constants
+    :param list viewports: (x_min, x_max, y_min, y_max) tuples
+    :param str precision: 'float32', 'float64' or 'auto' (the most demanding
+        viewport decides; float64, with a RuntimeWarning, where render()
+        would use perturbation)
+    :param int chunk_size: number of points per kernel call
+    :returns generator: yields a (n_views, height, width) count array per c
+    """
+    c_values = np.asarray(c_values, dtype=complex).ravel()
+    if precision == "auto":
+        precisions = {select_precision(*vp, width, height, bailout) for vp in viewports}
+        precision = next(p for p in ("perturbation", "float64", "float32") if p in precisions)
+        dtype = _float_dtype(precision, auto=True)
+    else:
+        dtype = _float_dtype(precision)
+
+    grids = [np.meshgrid(*grid(*vp, width, height, dtype)) for vp in viewports]
+    X = np.stack([g[0] for g in grids]).ravel()
+    Y = np.stack([g[1] for g in grids]).ravel()
+    cx, cy = c_values.real.astype(dtype), c_values.imag.astype(dtype)
+    n_points = X.size  # points per c
+    if n_points < chunk_size:
+        # several small frames per kernel call, on tiled copies of the grids:
+        n_group = chunk_size // n_points
+        X, Y = np.tile(X, n_group), np.tile(Y, n_group)
+        for i in range(0, len(c_values), n_group):
+            group = min(n_group, len(c_values) - i)
+            counts = escape_time(X[:group * n_points], Y[:group * n_points],
+                                 np.repeat(cx[i:i + group], n_points),
+                                 np.repeat(cy[i:i + group], n_points), max_iter, bailout, dtype)
+            yield from counts.reshape(group, len(viewports), height, width)
+    else:
+        # large frames in chunks of consecutive pixels:
+        for i in range(len(c_values)):
+            counts = np.empty(n_points, dtype=int)
+            for start in range(0, n_points, chunk_size):
+                stop = start + chunk_size
+                counts[start:stop] = escape_time(X[start:stop], Y[start:stop], cx[i], cy[i],
+                                                 max_iter, bailout, dtype)
+            yield counts.reshape(len(viewports), height, width)
+
+def julia_sweep(c_values, viewports, width, height, max_iter, bailout=2.0,
+                precision="auto", chunk_size=1 << 16):
+    """Like iter_julia_sweep, but returns all counts as one array, stored in
+    the smallest unsigned integer type that holds max_iter.
+
+    :returns ndarray: (n_c, n_views, height, width) escape counts
+    """
+    counts = np.empty((len(np.ravel(c_values)), len(viewports), height, width),
+                      dtype=np.min_scalar_type(max_iter))
+    for i, frame in enumerate(iter_julia_sweep(c_values, viewports, width, height, max_iter,
+                                               bailout, precision, chunk_size)):
+        counts[i] = frame
+    return counts
+# %% END
@@ -0,0 +1,268 @@
+"""
+A streaming GIF encoder with one global palette and delta frames.
+
+All frames of an animation share a single 256-color palette that is derived
+from the colormap LUTs (plus a few plain colors for the figure chrome). Each
+new frame is compared against the previous one, and only the bounding
+rectangle of the changed pixels is written; unchanged pixels inside that
+rectangle are set to a transparent index so that they compress to long runs.
+Frames are LZW-encoded by Pillow and written directly to the output file, so
+no external process (ImageMagick) and no temporary files are needed.
+
+Use it with matplotlib as
+
+    anim.save('images/julia_set_animation.gif',
+              writer=GlobalPaletteGIFWriter(fps=10, cmaps=('RdPu',)))
+
+or write integer index arrays directly with GIFEncoder.
+"""
+# %% IMPORTS
+from io import BytesIO
+import struct
+
+import numpy as np
+import matplotlib as mpl
+import matplotlib.colors as mcolors
+from matplotlib.animation import AbstractMovieWriter, writers
+from PIL import Image, GifImagePlugin
+# %% PALETTE
+TRANSPARENT_INDEX = 255  # reserved palette index for unchanged pixels
+_LUT_BITS = 6  # bits per channel of the RGB -> palette index lookup table
+
+def build_palette(cmaps=("viridis",), colors=("black",), n_greys=32, n_shades=8,
+                  background="white", cube=None):
+    """Builds a global palette of 255 colors (index 255 is kept free for the
+    transparency index).
+
+    The palette consists of a grey ramp (axes, text, anti-aliasing), a ramp
+    from each of the given plain colors towards the background color, an
+    optional uniform RGB cube for animations with arbitrary colors, and the
+    remaining entries are shared evenly between the LUTs of the given
+    colormaps.
+
+    :param tuple cmaps: names (or Colormap objects) of the colormaps to include
+    :param tuple colors: plain matplotlib colors used for lines/markers
+    :param int n_greys: number of grey levels between black and white
+    :param int n_shades: number of shades from each plain color to the background
+    :param background: the figure background color
+    :param tuple cube: number of (red, green, blue) levels of a uniform RGB
+        cube, e.g. (6, 7, 6); None for no cube
+    :returns Palette: the palette
+    """
+    entries = [np.linspace(0, 1, n_greys)[:, None].repeat(3, axis=1)]
+    bg = np.array(mcolors.to_rgb(background))
+    for color in colors:
+        rgb = np.array(mcolors.to_rgb(color))
+        t = np.linspace(0, 1, n_shades, endpoint=False)[:, None]
+        entries.append(rgb + t * (bg - rgb))
+    if cube is not None:
+        levels = np.meshgrid(*(np.linspace(0, 1, n) for n in cube), indexing="ij")
+        entries.append(np.stack(levels, axis=-1).reshape(-1, 3))
+    n_fixed = sum(len(e) for e in entries)
+    if n_fixed > TRANSPARENT_INDEX:
+        raise ValueError("too many fixed colors for a 256-color palette")
+
+    # share the remaining entries between the colormaps:
+    segments = {}
+    n_free = TRANSPARENT_INDEX - n_fixed
+    start = n_fixed
+    for k, cmap in enumerate(cmaps):
+        cmap = mpl.colormaps[cmap] if isinstance(cmap, str) else cmap
+        n = n_free // len(cmaps) + (1 if k < n_free % len(cmaps) else 0)
+        entries.append(cmap(np.linspace(0, 1, n))[:, :3])
+        segments[cmap.name] = (start, n)
+        start += n
+
+    rgb = np.concatenate(entries) if entries else np.zeros((0, 3))
+    rgb = np.round(np.clip(rgb, 0, 1) * 255).astype(np.uint8)
+    return Palette(rgb, segments)
+
+class Palette:
+    """A fixed palette of at most 255 RGB colors plus the transparency index.
+
+    :param ndarray rgb: (n, 3) uint8 array of palette colors
+    :param dict segments: colormap name -> (first index, number of entries)
+    """
+    def __init__(self, rgb, segments=None):
+        self.rgb = np.asarray(rgb, dtype=np.uint8)[:TRANSPARENT_INDEX]
+        self.segments = dict(segments or {})
+        self._lut = None
+
+    def tobytes(self):
+        """Returns the 768 bytes of the GIF color table."""
+        table = np.zeros((256, 3), dtype=np.uint8)
+        table[:len(self.rgb)] = self.rgb
+        return table.tobytes()
+
+    def _build_lut(self):
+        # nearest palette entry for every cell of a 2**_LUT_BITS RGB cube:
+        levels = (np.arange(2**_LUT_BITS) << (8 - _LUT_BITS)) + (1 << (7 - _LUT_BITS))
+        cube = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1)
+        cube = cube.reshape(-1, 3).astype(np.float32)
+        pal = self.rgb.astype(np.float32)
+        # |c - p|^2 = |c|^2 - 2 c.p + |p|^2, and |c|^2 does not change the argmin:
+        d = (pal**2).sum(axis=1)[None, :] - 2 * cube @ pal.T
+        self._lut = d.argmin(axis=1).astype(np.uint8)
+
+    def quantize(self, rgb):
+        """Maps an (h, w, 3) uint8 RGB image to palette indices.
+
+        :param ndarray rgb: the RGB image
+        :returns ndarray: (h, w) uint8 array of palette indices
+        """
+        if self._lut is None:
+            self._build_lut()
+        shift = 8 - _LUT_BITS
+        r = rgb[..., 0].astype(np.intp) >> shift
+        g = rgb[..., 1].astype(np.intp) >> shift
+        b = rgb[..., 2].astype(np.intp) >> shift
+        return self._lut[(r << 2 * _LUT_BITS) | (g << _LUT_BITS) | b]
+
+    def map_scalar(self, values, cmap, vmin=None, vmax=None):
+        """Maps scalar data (e.g. escape counts) directly onto the palette
+        entries of a colormap, without rendering a figure.
+
+        :param ndarray values: the data
+        :param str cmap: name of a colormap contained in the palette
+        :param float vmin: value mapped to the first color (default: data min)
+        :param float vmax: value mapped to the last color (default: data max)
+        :returns ndarray: uint8 array of palette indices
+        """
+        start, n = self.segments[cmap]
+        values = np.asarray(values, dtype=float)
+        vmin = values.min() if vmin is None else vmin
+        vmax = values.max() if vmax is None else vmax
+        t = (values - vmin) / (vmax - vmin) if vmax > vmin else np.zeros_like(values)
+        return (start + np.round(np.clip(t, 0, 1) * (n - 1))).astype(np.uint8)
+# %% GIF ENCODER
+class GIFEncoder:
+    """Streams palette-index frames into an animated GIF file.
+
+    Only the bounding box of the pixels that changed with respect to the
+    previous frame is stored; frames identical to the previous one are merged
+    into it by extending its delay.
+
+    :param file: path or binary file object of the GIF
+    :param int width: frame width in pixels
+    :param int height: frame height in pixels
+    :param Palette palette: the global palette
+    :param float delay: frame delay in milliseconds
+    :param int loop: number of loops (0 = forever, None = play once)
+    """
+    def __init__(self, file, width, height, palette, delay=100, loop=0):
+        self._own_file = isinstance(file, (str, bytes)) or hasattr(file, "__fspath__")
+        self._fp = open(file, "wb") if self._own_file else file
+        self.width, self.height = width, height
+        self.palette = palette
+        self.delay = delay
+        self._prev = None
+        self._pending = None  # (offset, image, delay) of the last unwritten frame
+        self._write_header(loop)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_header(self, loop):
+        # logical screen descriptor with a 256-entry global color table:
+        self._fp.write(b"GIF89a" + struct.pack("<HHBBB", self.width, self.height, 0xF7, 0, 0))
+        self._fp.write(self.palette.tobytes())
+        if loop is not None:
+            self._fp.write(b"!\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\x00")
+
+    def append(self, indices, delay=None):
+        """Appends a frame.
+
+        :param ndarray indices: (height, width) array of palette indices
+        :param float delay: delay of this frame in milliseconds (default: self.delay)
+        """
+        indices = np.ascontiguousarray(indices, dtype=np.uint8)
+        if indices.shape != (self.height, self.width):
+            raise ValueError(f"frame shape {indices.shape} does not match "
+                             f"({self.height}, {self.width})")
+        delay = self.delay if delay is None else delay
+
+        if self._prev is None:
+            offset, frame = (0, 0), indices
+        else:
+            changed = indices != self._prev
+            rows = np.flatnonzero(changed.any(axis=1))
+            if len(rows) == 0:
+                # identical frame: just show the previous one longer
+                self._pending = self._pending[:2] + (self._pending[2] + delay,)
+                return
+            cols = np.flatnonzero(changed.any(axis=0))
+            y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            frame = np.where(changed[y0:y1, x0:x1], indices[y0:y1, x0:x1], TRANSPARENT_INDEX)
+            offset = (int(x0), int(y0))
+
+        self._flush()
+        self._pending = (offset, np.ascontiguousarray(frame, dtype=np.uint8), delay)
+        self._prev = indices
+
+    def _flush(self):
+        if self._pending is None:
+            return
+        offset, frame, delay = self._pending
+        im = Image.frombytes("P", (frame.shape[1], frame.shape[0]), frame.tobytes())
+        # GCE + image descriptor + LZW data, without a local color table;
+        # disposal 1 keeps the previous frame below the transparent pixels:
+        for chunk in GifImagePlugin.getdata(im, offset, duration=delay,
+                                            transparency=TRANSPARENT_INDEX, disposal=1):
+            self._fp.write(chunk)
+        self._pending = None
+
+    def close(self):
+        """Writes the last frame and the trailer and closes the file."""
+        if self._fp is None:
+            return
+        self._flush()
+        self._fp.write(b";")
+        if self._own_file:
+            self._fp.close()
+        else:
+            self._fp.flush()
+        self._fp = None
+# %% MATPLOTLIB WRITER
+@writers.register("global_gif")
+class GlobalPaletteGIFWriter(AbstractMovieWriter):
+    """A matplotlib movie writer that streams frames into a GIFEncoder.
+
+    :param float fps: frames per second
+    :param tuple cmaps: colormaps used in the animation (see build_palette)
+    :param tuple colors: plain colors used in the animation (see build_palette)
+    :param Palette palette: a prebuilt palette (overrides cmaps/colors)
+    :param int loop: number of loops (0 = forever)
+    """
+    def __init__(self, fps=5, cmaps=("viridis",), colors=("black",), palette=None,
+                 loop=0, metadata=None, codec=None, bitrate=None):
+        super().__init__(fps=fps, metadata=metadata, codec=codec, bitrate=bitrate)
+        self.palette = palette if palette is not None else build_palette(cmaps, colors)
+        self.loop = loop
+        self._encoder = None
+
+    @classmethod
+    def isAvailable(cls):
+        return True
+
+    def setup(self, fig, outfile, dpi=None):
+        super().setup(fig, outfile, dpi=dpi)
+        self._encoder = None  # opened with the first frame, when its size is known
+
+    def grab_frame(self, **savefig_kwargs):
+        buf = BytesIO()
+        self.fig.savefig(buf, **{**savefig_kwargs, "format": "rgba", "dpi": self.dpi})
+        width, height = (int(round(v)) for v in self.frame_size)
+        rgba = np.frombuffer(buf.getbuffer(), dtype=np.uint8).reshape(height, width, 4)
+        if self._encoder is None:
+            self._encoder = GIFEncoder(self.outfile, width, height, self.palette,
+                                       delay=1000 / self.fps, loop=self.loop)
+        self._encoder.append(self.palette.quantize(rgba[..., :3]))
+
+    def finish(self):
+        if self._encoder is not None:
+            self._encoder.close()
+            self._encoder = None
+# %% END
@@ -0,0 +1,209 @@
+"""
+A vectorized engine for iterated function systems (IFS) and L-systems.
+
+A fractal is described either by a set of affine maps or by L-system rewrite
+rules. Both are expanded level by level on NumPy arrays instead of by Python
+recursion:
+
+* expand() composes all maps of an IFS with all maps of the previous level in
+  one batched matrix product and returns the exact geometry to a given depth,
+* chaos_game() iterates many random walkers in parallel and rasterize()
+  bins the resulting point cloud into an image,
+* lsystem() rewrites a string with str.translate and turtle() converts the
+  commands to vertices with cumulative sums.
+
+An affine map x -> A x + t is stored as the 2x3 matrix [A | t], and an IFS
+as an (n, 2, 3) array of such matrices.
+"""
+# %% IMPORTS
+import numpy as np
+# %% AFFINE MAPS
+def similarity(scale=1.0, angle=0.0, translation=(0.0, 0.0), flip=False):
+    """Builds the map x -> scale * R(angle) * x + translation, where R is a
+    rotation (and a reflection about the x-axis first, if flip is True).
+
+    :returns ndarray: (2, 3) affine map
+    """
+    c, s = np.cos(angle), np.sin(angle)
+    A = scale * np.array([[c, -s], [s, c]])
+    if flip:
+        A = A @ np.diag([1.0, -1.0])
+    return np.column_stack([A, translation])
+
+def segment_frame(p1, p2):
+    """The similarity that maps the unit segment (0, 0) -> (1, 0) onto the
+    segment p1 -> p2.
+
+    :returns ndarray: (2, 3) affine map
+    """
+    p1, p2 = np.asarray(p1, dtype=float), np.asarray(p2, dtype=float)
+    d = p2 - p1
+    return similarity(np.hypot(*d), np.arctan2(d[1], d[0]), p1)
+
+def compose(outer, inner):
+    """Composition outer(inner(x)) of affine maps, broadcasting over leading
+    dimensions.
+
+    :returns ndarray: (..., 2, 3) affine maps
+    """
+    outer, inner = np.asarray(outer), np.asarray(inner)
+    A = outer[..., :2] @ inner[..., :2]
+    t = (outer[..., :2] @ inner[..., 2:])[..., 0] + outer[..., 2]
+    return np.concatenate([A, t[..., None]], axis=-1)
+
+def conjugate(maps, frame):
+    """Transports an IFS defined in a local frame into world coordinates,
+    i.e., frame o map o frame^-1 for every map.
+
+    :param ndarray maps: (n, 2, 3) affine maps in local coordinates
+    :param ndarray frame: (2, 3) affine map from local to world coordinates
+    :returns ndarray: (n, 2, 3) affine maps in world coordinates
+    """
+    frame = np.asarray(frame, dtype=float)
+    A_inv = np.linalg.inv(frame[:, :2])
+    frame_inv = np.column_stack([A_inv, -A_inv @ frame[:, 2]])
+    return compose(frame, compose(maps, frame_inv))
+# %% IFS: EXACT GEOMETRY
+def expand(maps, shape, depth):
+    """Applies the IFS 'depth' times to an initial shape.
+
+    Every level composes all maps of the previous level with all maps of
+    the IFS at once (a batched 2x3 matrix product), and the resulting
+    n**depth maps are applied to the shape in a single product at the end.
+    Pieces that share their parent are adjacent in the output, in the order
+    of a depth-first recursion.
+
+    :param ndarray maps: (n, 2, 3) affine maps
+    :param ndarray shape: (k, 2) vertices of the initial shape (e.g., a
+        segment or a polygon)
+    :param int depth: number of levels
+    :returns ndarray: (n**depth, k, 2) vertices of all pieces
+    """
+    maps = np.asarray(maps, dtype=float)
+    shape = np.asarray(shape, dtype=float)
+    level = np.column_stack([np.eye(2), np.zeros(2)])[None]
+    for _ in range(depth):
+        level = compose(level[:, None], maps[None]).reshape(-1, 2, 3)
+    return np.einsum("mij,kj->mki", level[:, :, :2], shape) + level[:, None, :, 2]
+# %% IFS: CHAOS GAME
+def chaos_game(maps, n_points, probabilities=None, n_walkers=1 << 14, burn_in=20,
+               seed=None):
+    """Samples the attractor of an IFS with many random walkers in parallel.
+
+    :param ndarray maps: (n, 2, 3) affine maps
+    :param int n_points: number of points to return
+    :param ndarray probabilities: probability of each map (default: equal)
+    :param int n_walkers: number of walkers iterated simultaneously
+    :param int burn_in: steps before points are recorded
+    :param int seed: random seed
+    :returns ndarray: (n_points, 2) points on the attractor
+    """
+    maps = np.asarray(maps, dtype=float)
+    rng = np.random.default_rng(seed)
+    if probabilities is None:
+        probabilities = np.full(len(maps), 1 / len(maps))
+    cumulative = np.cumsum(probabilities) / np.sum(probabilities)
+    a, b, tx = maps[:, 0, 0], maps[:, 0, 1], maps[:, 0, 2]
+    c, d, ty = maps[:, 1, 0], maps[:, 1, 1], maps[:, 1, 2]
+
+    n_walkers = max(1, min(n_walkers, n_points))
+    x, y = rng.random(n_walkers), rng.random(n_walkers)
+    points = np.empty((n_points, 2))
+    n_steps = burn_in + -(-n_points // n_walkers)
+    for step in range(n_steps):
+        k = np.searchsorted(cumulative, rng.random(n_walkers), side="right")
+        k = np.minimum(k, len(maps) - 1)
+        x, y = a[k] * x + b[k] * y + tx[k], c[k] * x + d[k] * y + ty[k]
+        i = (step - burn_in) * n_walkers
+        if i >= 0:
+            n = min(n_walkers, n_points - i)
+            points[i:i + n, 0], points[i:i + n, 1] = x[:n], y[:n]
+    return points
+
+def rasterize(points, width, height, extent=None):
+    """Bins a point cloud into an image of hit counts.
+
+    :param ndarray points: (n, 2) points
+    :param int width: image width in pixels
+    :param int height: image height in pixels
+    :param tuple extent: (x_min, x_max, y_min, y_max); default: bounding box
+    :returns ndarray: (height, width) counts; row 0 corresponds to y_min
+    """
+    points = np.asarray(points, dtype=float)
+    if extent is None:
+        extent = (points[:, 0].min(), points[:, 0].max(), points[:, 1].min(), points[:, 1].max())
+    x_min, x_max, y_min, y_max = extent
+    col = np.floor((points[:, 0] - x_min) / (x_max - x_min) * width).astype(np.intp)
+    row = np.floor((points[:, 1] - y_min) / (y_max - y_min) * height).astype(np.intp)
+    # points on the upper/right edge belong to the last pixel:
+    col[col == width] = width - 1
+    row[row == height] = height - 1
+    inside = (col >= 0) & (col < width) & (row >= 0) & (row < height)
+    return np.bincount(row[inside] * width + col[inside],
+                       minlength=width * height).reshape(height, width)
+# %% L-SYSTEMS
+def lsystem(axiom, rules, depth):
+    """Rewrites an L-system string 'depth' times.
+
+    :param str axiom: the start string
+    :param dict rules: symbol -> replacement string
+    :param int depth: number of rewriting steps
+    :returns str: the expanded string
+    """
+    table = str.maketrans(rules)
+    s = axiom
+    for _ in range(depth):
+        s = s.translate(table)
+    return s
+
+def turtle(commands, angle, step=1.0, start=(0.0, 0.0), heading=0.0, draw="FG"):
+    """Converts turtle commands into the vertices of a polyline.
+
+    Symbols in 'draw' move forward by 'step', '+' turns left and '-' turns
+    right by 'angle' (radians); all other symbols are ignored. Branches
+    ('[' and ']') are not supported.
+
+    :returns ndarray: (n_moves + 1, 2) vertices
+    """
+    if "[" in commands or "]" in commands:
+        raise ValueError("branching L-systems are not supported")
+    codes = np.frombuffer(commands.encode("ascii"), dtype=np.uint8)
+    turns = np.zeros(len(codes))
+    turns[codes == ord("+")] = angle
+    turns[codes == ord("-")] = -angle
+    headings = heading + np.cumsum(turns)
+    moves = np.isin(codes, np.frombuffer(draw.encode("ascii"), dtype=np.uint8))
+    steps = step * np.exp(1j * headings[moves])
+    path = np.concatenate([[complex(*start)], complex(*start) + np.cumsum(steps)])
+    return np.column_stack([path.real, path.imag])
+# %% CONFIGURATIONS
+# Koch curve on the unit segment, with the bump pointing to the right of the
+# direction of travel (a clockwise triangle then grows outwards):
+KOCH_CURVE = np.array([
+    similarity(1 / 3, 0.0, (0.0, 0.0)),
+    similarity(1 / 3, -np.pi / 3, (1 / 3, 0.0)),
+    similarity(1 / 3, np.pi / 3, (0.5, -np.sqrt(3) / 6)),
+    similarity(1 / 3, 0.0, (2 / 3, 0.0))])
+
+def koch_maps(p1, p2):
+    """The Koch curve IFS on the segment p1 -> p2."""
+    return conjugate(KOCH_CURVE, segment_frame(p1, p2))
+
+def sierpinski_maps(p1, p2, p3):
+    """The Sierpinski triangle IFS of the triangle p1, p2, p3: halving
+    towards each vertex."""
+    return np.array([np.column_stack([0.5 * np.eye(2), 0.5 * np.asarray(p, dtype=float)])
+                     for p in (p1, p2, p3)])
+
+# Barnsley fern (maps and probabilities):
+BARNSLEY_FERN = np.array([
+    [[0.00, 0.00, 0.0], [0.00, 0.16, 0.00]],
+    [[0.85, 0.04, 0.0], [-0.04, 0.85, 1.60]],
+    [[0.20, -0.26, 0.0], [0.23, 0.22, 1.60]],
+    [[-0.15, 0.28, 0.0], [0.26, 0.24, 0.44]]])
+BARNSLEY_FERN_PROBABILITIES = np.array([0.01, 0.85, 0.07, 0.07])
+
+# L-systems as (axiom, rules, angle):
+KOCH_SNOWFLAKE_LSYSTEM = ("F--F--F", {"F": "F+F--F+F"}, np.pi / 3)
+DRAGON_CURVE_LSYSTEM = ("FX", {"X": "X+YF+", "Y": "-FX-Y"}, np.pi / 2)
+# %% END
@@ -0,0 +1,339 @@
+"""
+A batch runner for fractal animations described in a JSON or TOML spec.
+
+Each job of the spec names a frame generator, a parameter schedule, the
+resolution and the output GIF:
+
+    checkpoint_dir = "checkpoints"
+
+    [[jobs]]
+    name = "koch"
+    generator = "koch_snowflake"
+    output = "images/koch_snowflake_animation.gif"
+    resolution = [640, 480]
+    fps = 60
+    frames = 120
+    params.depth = {start = 0.05, stop = 6.0, round = "floor"}
+
+A parameter is either a constant, a list with one value per frame, a table
+{start, stop, scale = "linear" | "geometric", round = "floor" | "nearest"}
+that is interpolated over the frames, or a table {keyframes = [[frame,
+value], ...]} that is interpolated linearly between the given frames.
+Parameters that a job does not set take the defaults of the generator.
+
+All frames of all jobs are identified by a hash of (generator, resolution,
+parameters), so identical frames (e.g. the repeated depths of the Koch
+animation, or the same frame in two jobs) are rendered only once. The
+unique frames are rendered in a process pool and every finished frame is
+written to the checkpoint directory as a PNG. A restarted run skips all
+frames that already have a checkpoint, and the GIFs are assembled from the
+checkpoints once all frames of a job exist. The hash also covers the source
+code of the generator and GENERATOR_VERSION, so checkpoints of an older
+version of a generator are not reused.
+
+    python job_runner.py jobs.toml --workers 4
+"""
+# %% IMPORTS
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from PIL import Image
+
+from gif_writer import GIFEncoder, build_palette
+from escape_time import render
+from ifs import expand, koch_maps, sierpinski_maps
+from curve_envelope import plot_envelope
+try:
+    import tomllib  # python >= 3.11
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+# %% FRAME GENERATORS
+# every generator returns an (height, width, 3) uint8 RGB image. Generators
+# must be module-level functions, so that they can run in worker processes.
+def _escape_time_rgb(counts, max_iter, cmap, normalize):
+    if normalize == "frame":  # like imshow: the frame's range spans the colormap
+        lo, hi = counts.min(), counts.max()
+        rgb = mpl.colormaps[cmap]((counts - lo) / max(hi - lo, 1))[..., :3]
+    elif normalize == "max_iter":
+        rgb = mpl.colormaps[cmap](counts / max_iter)[..., :3]
+        rgb[counts == max_iter] = 0  # the interior is black
+    else:
+        raise ValueError(f"unknown normalization '{normalize}'")
+    return (rgb[::-1] * 255).astype(np.uint8)  # row 0 is the top
+
+def _viewport(width, height, center_x, center_y, span, x_min, x_max, y_min, y_max):
+    """Explicit bounds, or the bounds of a viewport of width 'span' with the
+    aspect of the image."""
+    if None not in (x_min, x_max, y_min, y_max):
+        return x_min, x_max, y_min, y_max
+    half_x, half_y = span / 2, span * height / width / 2
+    return center_x - half_x, center_x + half_x, center_y - half_y, center_y + half_y
+
+def mandelbrot(width, height, center_x=-0.5, center_y=0.0, span=3.0, x_min=None, x_max=None,
+               y_min=None, y_max=None, max_iter=256, cmap="magma", normalize="max_iter"):
+    viewport = _viewport(width, height, center_x, center_y, span, x_min, x_max, y_min, y_max)
+    counts = render(*viewport, width, height, max_iter)
+    return _escape_time_rgb(counts, max_iter, cmap, normalize)
+
+def julia(width, height, c_re=-0.8, c_im=0.156, center_x=0.0, center_y=0.0, span=4.0,
+          x_min=None, x_max=None, y_min=None, y_max=None, max_iter=256, cmap="magma",
+          normalize="max_iter"):
+    viewport = _viewport(width, height, center_x, center_y, span, x_min, x_max, y_min, y_max)
+    counts = render(*viewport, width, height, max_iter, c=complex(c_re, c_im))
+    return _escape_time_rgb(counts, max_iter, cmap, normalize)
+
+def _figure(width, height):
+    fig = Figure(figsize=(width / 100, height / 100), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.axis('off')
+    return fig, ax
+
+def _pixels(fig):
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba())[..., :3].copy()
+
+def koch_snowflake(width, height, depth=0, color="b"):
+    fig, ax = _figure(width, height)
+    ax.set_aspect('equal')
+    p1, p2, p3 = [-0.5, -0.288], [0.5, -0.288], [0.0, 0.577]
+    for a, b in ((p1, p2), (p2, p3), (p3, p1)):
+        ax.add_collection(LineCollection(expand(koch_maps(a, b), [a, b], int(depth)),
+                                         colors=color))
+    ax.set_xlim(-0.7, 0.7)
+    ax.set_ylim(-0.7, 0.7)
+    ax.text(0.02, 0.95, f'Depth: {int(depth)}', transform=ax.transAxes, fontsize=12)
+    return _pixels(fig)
+
+def sierpinski_triangle(width, height, depth=0, color="k"):
+    fig, ax = _figure(width, height)
+    ax.set_aspect('equal')
+    p1, p2, p3 = [0, 0], [0.5, np.sqrt(3) / 2], [1, 0]
+    triangles = expand(sierpinski_maps(p1, p2, p3), [p1, p2, p3], int(depth))
+    ax.add_collection(PolyCollection(triangles, color=color))
+    ax.set_xlim(-0.1, 1.1)
+    ax.set_ylim(-0.1, 1.1)
+    return _pixels(fig)
+
+def weierstrass(width, height, b=0.5, n_terms=500, x_min=-3.0, x_max=3.0, n_samples=2**20,
+                color="C0"):
+    def w(x):
+        ws = np.zeros_like(x)
+        for n in range(min(n_terms, 54)):  # later terms are below float64 resolution
+            ws += np.cos(b**n * np.pi * x) / 2**n
+        return ws
+    fig, ax = _figure(width, height)
+    ax.axis('on')
+    ax.set_position([0.08, 0.08, 0.9, 0.9])
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(-2.1, 2.1)
+    plot_envelope(ax, w, x_min, x_max, n_samples, color=color)
+    ax.annotate(f'b = {b:.2f}', (0.05, 0.95), xycoords='axes fraction')
+    return _pixels(fig)
+
+def weierstrass_surface(width, height, b=1.0, n_terms=10, x_min=-2.0, x_max=2.0, steps=1000,
+                        cmap="viridis"):
+    x = np.linspace(x_min, x_max, steps)
+    X, Y = np.meshgrid(x, x)
+    Z = np.zeros_like(X)
+    for n in range(n_terms):
+        Z += 0.5**n * np.sin(b**n * np.pi * X) * np.sin(b**n * np.pi * Y)
+    fig = Figure(figsize=(width / 100, height / 100), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    ax.set_zlim(-1, 1)
+    ax.plot_surface(X, Y, Z, cmap=cmap)
+    ax.text2D(0.05, 0.95, f"b = {b:.2f}", transform=ax.transAxes)
+    fig.tight_layout()
+    return _pixels(fig)
+
+GENERATORS = {f.__name__: f for f in (mandelbrot, julia, koch_snowflake,
+                                      sierpinski_triangle, weierstrass, weierstrass_surface)}
+# the frame keys include the source code of the generators, so that editing a
+# generator invalidates its checkpoints; changes elsewhere that alter frames
+# (in the renderers or the helpers above) must bump GENERATOR_VERSION:
+GENERATOR_VERSION = 1
+_SOURCE_HASHES = {name: hashlib.sha256(inspect.getsource(f).encode()).hexdigest()
+                  for name, f in GENERATORS.items()}
+# %% SPECS AND SCHEDULES
+def load_spec(path):
+    """Reads a job spec from a .json or .toml file.
+
+    :returns dict: the spec
+    """
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ImportError("reading TOML specs requires Python >= 3.11 or the tomli package")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+def schedule(value, n_frames):
+    """Expands a parameter schedule to one value per frame.
+
+    :param value: a constant, a list of n_frames values, or a dict
+        {start, stop, scale='linear'|'geometric', round=None|'floor'|'nearest'}
+        or {keyframes=[[frame, value], ...], round=...}
+    :returns list: the values
+    """
+    if isinstance(value, list):
+        if len(value) != n_frames:
+            raise ValueError(f"schedule has {len(value)} values for {n_frames} frames")
+        return value
+    if not isinstance(value, dict):
+        return [value] * n_frames
+    scale = value.get("scale", "linear")
+    if "keyframes" in value:
+        frames, points = np.transpose(value["keyframes"])
+        values = np.interp(np.arange(n_frames), frames, points)
+    elif scale == "linear":
+        values = np.linspace(value["start"], value["stop"], n_frames)
+    elif scale == "geometric":
+        values = np.geomspace(value["start"], value["stop"], n_frames)
+    else:
+        raise ValueError(f"unknown schedule scale '{scale}'")
+    rounding = value.get("round")
+    if rounding == "floor":
+        values = np.floor(values).astype(int)
+    elif rounding == "nearest":
+        values = np.round(values).astype(int)
+    elif rounding is not None:
+        raise ValueError(f"unknown schedule rounding '{rounding}'")
+    return values.tolist()
+
+def frame_key(generator, width, height, params):
+    """Hash that identifies a frame across jobs and runs."""
+    text = json.dumps([GENERATOR_VERSION, _SOURCE_HASHES[generator], generator, width, height,
+                       params], sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+def job_frames(job):
+    """Lists the frames of a job.
+
+    :returns list: (key, params) of every frame, in order
+    """
+    if job["generator"] not in GENERATORS:
+        raise ValueError(f"unknown generator '{job['generator']}' in job '{job.get('name')}'")
+    params = job.get("params", {})
+    signature = inspect.signature(GENERATORS[job["generator"]]).parameters
+    unknown = set(params) - (set(signature) - {"width", "height"})
+    if unknown:
+        raise ValueError(f"unknown parameters {sorted(unknown)} in job '{job.get('name')}'")
+    # the defaults of the generator are part of the frame key and the palette:
+    defaults = {name: p.default for name, p in signature.items()
+                if p.default is not inspect.Parameter.empty}
+    n_frames = job.get("frames")
+    if n_frames is None:  # taken from the explicit lists
+        lengths = {len(v) for v in params.values() if isinstance(v, list)}
+        if len(lengths) != 1:
+            raise ValueError(f"job '{job.get('name')}' needs 'frames'")
+        n_frames = lengths.pop()
+    columns = {name: schedule(value, n_frames) for name, value in params.items()}
+    width, height = job["resolution"]
+    frames = []
+    for i in range(n_frames):
+        p = {**defaults, **{name: values[i] for name, values in columns.items()}}
+        if p.get("max_iter", 1) <= 0:
+            raise ValueError(f"max_iter must be positive in job '{job.get('name')}'")
+        frames.append((frame_key(job["generator"], width, height, p), p))
+    return frames
+# %% RENDERING
+def _render_frame(generator, width, height, params, path):
+    """Renders a frame and writes it to its checkpoint (in a worker)."""
+    start = time.perf_counter()
+    rgb = GENERATORS[generator](width, height, **params)
+    if rgb.shape != (height, width, 3):
+        raise ValueError(f"{generator} returned shape {rgb.shape}, expected ({height}, {width}, 3)")
+    tmp = path + ".tmp"
+    Image.fromarray(rgb).save(tmp, format="PNG")
+    os.replace(tmp, path)  # a checkpoint is either complete or absent
+    return time.perf_counter() - start
+
+def _assemble(job, frames, checkpoint_dir):
+    """Writes the GIF of a job from its frame checkpoints."""
+    width, height = job["resolution"]
+    # the palette contains all colormaps and colors the frames use:
+    cmaps = sorted({p["cmap"] for _, p in frames if "cmap" in p})
+    colors = sorted({p["color"] for _, p in frames if "color" in p})
+    palette = build_palette(cmaps=tuple(cmaps), colors=tuple(colors) or ("black",))
+    os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+    with GIFEncoder(job["output"], width, height, palette,
+                    delay=1000 / job.get("fps", 10)) as gif:
+        for key, _ in frames:
+            rgb = np.asarray(Image.open(os.path.join(checkpoint_dir, key + ".png")).convert("RGB"))
+            gif.append(palette.quantize(rgb))
+
+def run(spec, workers=None, only=None):
+    """Renders all missing frames of a spec and assembles the GIFs.
+
+    :param dict spec: the job spec
+    :param int workers: number of worker processes (default: spec 'workers'
+        or the number of CPUs)
+    :param list only: names of the jobs to run (default: all)
+    :returns bool: True if all jobs were written
+    """
+    checkpoint_dir = spec.get("checkpoint_dir", "checkpoints")
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    jobs = [job for job in spec["jobs"] if only is None or job.get("name") in only]
+    frames = [job_frames(job) for job in jobs]
+
+    # unique frames that are not checkpointed yet:
+    todo = {}
+    for job, job_frames_ in zip(jobs, frames):
+        for key, params in job_frames_:
+            if not os.path.exists(os.path.join(checkpoint_dir, key + ".png")):
+                todo[key] = (job["generator"], *job["resolution"], params)
+    n_total = sum(len(f) for f in frames)
+    n_unique = len({key for f in frames for key, _ in f})
+    print(f"{len(jobs)} jobs, {n_total} frames, {n_unique} unique, "
+          f"{n_unique - len(todo)} checkpointed, {len(todo)} to render")
+
+    failed = set()
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers or spec.get("workers")) as pool:
+            futures = {pool.submit(_render_frame, *args,
+                                   os.path.join(checkpoint_dir, key + ".png")): key
+                       for key, args in todo.items()}
+            for n, future in enumerate(as_completed(futures), 1):
+                key = futures[future]
+                try:
+                    seconds = future.result()
+                except Exception as err:
+                    failed.add(key)
+                    print(f"[{n}/{len(todo)}] {todo[key][0]} {key} failed: {err!r}")
+                else:
+                    print(f"[{n}/{len(todo)}] {todo[key][0]} {key} in {seconds:.2f} s")
+
+    ok = True
+    for job, job_frames_ in zip(jobs, frames):
+        if any(key in failed for key, _ in job_frames_):
+            print(f"skipping {job.get('name')}: some frames failed")
+            ok = False
+            continue
+        _assemble(job, job_frames_, checkpoint_dir)
+        print(f"wrote {job['output']}")
+    return ok
+# %% MAIN
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("spec", help="JSON or TOML job spec")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--job", action="append", dest="only", help="run only this job (repeatable)")
+    args = parser.parse_args()
+    sys.exit(0 if run(load_spec(args.spec), args.workers, args.only) else 1)
+# %% END
@@ -11,21 +11,13 @@ date: Aug 2, 2021
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from gif_writer import GlobalPaletteGIFWriter
+from escape_time import render, render_antialiased, julia_sweep
 # %% JULIA SET 1:
 def julia_set(c, width, height, x_min, x_max, y_min, y_max, max_iter):
-    x = np.linspace(x_min, x_max, width)
-    y = np.linspace(y_min, y_max, height)
-    X, Y = np.meshgrid(x, y)
-    Z = X + 1j * Y
-
-    img = np.zeros_like(Z, dtype=int)
-
-    for i in range(max_iter):
-        mask = np.abs(Z) < 4
-        Z[mask] = Z[mask] ** 2 + c
-        img += mask
-
-    return img
+    # counts the iterations with |z| < 4; the arithmetic (float32, float64 or
+    # perturbation) is chosen automatically from the pixel spacing:
+    return render(x_min, x_max, y_min, y_max, width, height, max_iter, c=c, bailout=4.)
 
 # set up the figure and subplots:
 fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 5))
@@ -56,19 +48,25 @@ ax2.set_title('Julia Set (Zoomed)')
 ax2.set_xlabel('Re(c)')
 ax2.set_ylabel('Im(c)')
 
+# compute both views for all values of c in one batched sweep, which
+# reuses the coordinate grids instead of rebuilding them for every frame:
+frames = julia_sweep(c_values, [(x_min, x_max, y_min, y_max),
+                                (zoom_x_min, zoom_x_max, zoom_y_min, zoom_y_max)],
+                     width, height, max_iter, bailout=4.)
+
 # update function:
 def update(frame):
     # update plot 1 - full Julia set:
-    img1.set_array(julia_set(c_values[frame], width, height, x_min, x_max, y_min, y_max, max_iter))
+    img1.set_array(frames[frame, 0])
     ax1.set_title(f"c = {c_values[frame]:.2f}")
 
     # update plot 2 - zoomed-in Julia set:
-    img2.set_array(julia_set(c_values[frame], width, height, zoom_x_min, zoom_x_max, zoom_y_min, zoom_y_max, max_iter))
+    img2.set_array(frames[frame, 1])
     ax2.set_title(f"c = {c_values[frame]:.2f}")
 
 # create and save the animation:
 anim = FuncAnimation(fig, update, frames=len(c_values), interval=100)
-anim.save('images/julia_set_animation.gif', writer='pillow', dpi=120)
+anim.save('images/julia_set_animation.gif', writer=GlobalPaletteGIFWriter(fps=10, cmaps=('RdPu',)), dpi=120)
 plt.show()
 # %% JULIA SET 2:
 # define parameters:
@@ -90,45 +88,22 @@ a = np.linspace(0, 2*np.pi, frames)
 fig = plt.figure(figsize=(10, 10))  # instantiate a figure to draw
 ax = plt.axes()  # create an axes object
 
-def julia_quadratic(zx, zy, cx, cy, threshold):
-    """Calculates whether the number z[0] = zx + i*zy with a constant c = x + i*y
-    belongs to the Julia set. In order to belong, the sequence 
-    z[i + 1] = z[i]**2 + c, must not diverge after 'threshold' number of steps.
-    The sequence diverges if the absolute value of z[i+1] is greater than 4.
-    
-    :param float zx: the x component of z[0]
-    :param float zy: the y component of z[0]
-    :param float cx: the x component of the constant c
-    :param float cy: the y component of the constant c
-    :param int threshold: the number of iterations to considered it converged
-    """
-    # initial conditions
-    z = complex(zx, zy)
-    c = complex(cx, cy)
-    
-    for i in range(threshold):
-        z = z**2 + c
-        if abs(z) > 4.:  # it diverged
-            return i
-        
-    return threshold - 1  # it didn't diverge
-
 def animate(i):
     ax.clear()  # clear axes object
     ax.set_xticks([], [])  # clear x-axis ticks
     ax.set_yticks([], [])  # clear y-axis ticks
     
-    X = np.empty((len(re), len(im)))  # the initial array-like image
     cx, cy = r * np.cos(a[i]), r * np.sin(a[i])  # the initial c number
     
-    # iterations for the given threshold
-    for i in range(len(re)):
-        for j in range(len(im)):
-            X[i, j] = julia_quadratic(re[i], im[j], cx, cy, threshold)
+    # iterations for the given threshold; only the pixels on the set boundary
+    # are supersampled, so no bicubic smoothing is needed:
+    X = render_antialiased(x_start, x_start + width, y_start, y_start + height,
+                           len(re), len(im), threshold, c=complex(cx, cy), bailout=4.,
+                           seed=0)  # the same jitter in every run and frame
     
-    img = ax.imshow(X.T, interpolation="bicubic", cmap='magma')
+    img = ax.imshow(X, interpolation="nearest", cmap='magma')
     plt.tight_layout()
     return [img]
 
-anim = animation.FuncAnimation(fig, animate, frames=frames, interval=50, blit=True)
-anim.save('images/julia_set_animation_2.gif', writer='imagemagick')
\ No newline at end of file
+anim = FuncAnimation(fig, animate, frames=frames, interval=50, blit=True)
+anim.save('images/julia_set_animation_2.gif', writer=GlobalPaletteGIFWriter(fps=20, cmaps=('magma',)))
\ No newline at end of file
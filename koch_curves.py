@@ -8,27 +8,16 @@ date: Aug 2, 2021
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from matplotlib.collections import LineCollection
+from gif_writer import GlobalPaletteGIFWriter, build_palette
+from ifs import expand, koch_maps
 import random
 # %% KOCH SNOWFLAKE ANIMATION
 def koch_snowflake(ax, p1, p2, depth=0):
-    if depth == 0:
-        ax.plot([p1[0], p2[0]], [p1[1], p2[1]], color='b')
-    else:
-        dx = p2[0] - p1[0]
-        dy = p2[1] - p1[1]
-        length = np.sqrt(dx**2 + dy**2)
-        unit = length / 3.0
-        angle = np.arctan2(dy, dx)
-
-        p1_new = p1
-        p2_new = [p1[0] + np.cos(angle) * unit, p1[1] + np.sin(angle) * unit]
-        p3_new = [p2_new[0] + np.cos(angle - np.pi / 3) * unit, p2_new[1] + np.sin(angle - np.pi / 3) * unit]
-        p4_new = [p1[0] + np.cos(angle) * 2 * unit, p1[1] + np.sin(angle) * 2 * unit]
-
-        koch_snowflake(ax, p1_new, p2_new, depth - 1)
-        koch_snowflake(ax, p2_new, p3_new, depth - 1)
-        koch_snowflake(ax, p3_new, p4_new, depth - 1)
-        koch_snowflake(ax, p4_new, p2, depth - 1)
+    # all 4**depth segments of the Koch curve on p1 -> p2 at once, drawn as
+    # a single collection:
+    segments = expand(koch_maps(p1, p2), [p1, p2], depth)
+    ax.add_collection(LineCollection(segments, colors='b'))
 
 fig, ax = plt.subplots()
 ax.set_aspect('equal')
@@ -67,31 +56,20 @@ def update(frame):
     ax.text(0.02, 0.95, 'Depth: {}'.format(current_depth), transform=ax.transAxes, color='black', fontsize=12)
 
 anim = FuncAnimation(fig, update, frames=120, interval=100)
-anim.save('images/koch_snowflake_animation.gif', writer='pillow', fps=60)
+anim.save('images/koch_snowflake_animation.gif', writer=GlobalPaletteGIFWriter(fps=60, cmaps=(), colors=('b',)))
 plt.show()
 # %% KOCH SNOWFLAKE ANIMATION W/ CHANGING COLORS
 def koch_snowflake(ax, p1, p2, depth=0, color='b'):
-    if depth == 0:
-        ax.plot([p1[0], p2[0]], [p1[1], p2[1]], color=color)
+    segments = expand(koch_maps(p1, p2), [p1, p2], depth)
+    if depth > 0:
+        # generate a random color for each group of 4 sibling segments
+        # (segments of the same parent are adjacent in the expansion):
+        colors = ['#' + ''.join(random.choices('0123456789ABCDEF', k=6))
+                  for _ in range(len(segments) // 4)]
+        colors = np.repeat(colors, 4)
     else:
-        dx = p2[0] - p1[0]
-        dy = p2[1] - p1[1]
-        length = np.sqrt(dx**2 + dy**2)
-        unit = length / 3.0
-        angle = np.arctan2(dy, dx)
-
-        p1_new = p1
-        p2_new = [p1[0] + np.cos(angle) * unit, p1[1] + np.sin(angle) * unit]
-        p3_new = [p2_new[0] + np.cos(angle - np.pi / 3) * unit, p2_new[1] + np.sin(angle - np.pi / 3) * unit]
-        p4_new = [p1[0] + np.cos(angle) * 2 * unit, p1[1] + np.sin(angle) * 2 * unit]
-
-        # generate a random color for each recursion level:
-        new_color = '#' + ''.join(random.choices('0123456789ABCDEF', k=6))
-
-        koch_snowflake(ax, p1_new, p2_new, depth - 1, new_color)
-        koch_snowflake(ax, p2_new, p3_new, depth - 1, new_color)
-        koch_snowflake(ax, p3_new, p4_new, depth - 1, new_color)
-        koch_snowflake(ax, p4_new, p2, depth - 1, new_color)
+        colors = [color]
+    ax.add_collection(LineCollection(segments, colors=colors))
 
 fig, ax = plt.subplots()
 ax.set_aspect('equal')
@@ -130,6 +108,8 @@ def update(frame):
     ax.text(0.02, 0.95, 'Depth: {}'.format(current_depth), transform=ax.transAxes, color='black', fontsize=12)
 
 anim = FuncAnimation(fig, update, frames=100, interval=100)
-anim.save('images/koch_snowflake_animation_color.gif', writer='pillow', fps=60)
+# the random segment colors need a uniform RGB cube in the palette:
+palette = build_palette(cmaps=(), colors=(), n_greys=3, cube=(6, 7, 6))
+anim.save('images/koch_snowflake_animation_color.gif', writer=GlobalPaletteGIFWriter(fps=60, palette=palette))
 plt.show()
 # %% END
\ No newline at end of file
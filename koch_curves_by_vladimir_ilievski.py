@@ -7,6 +7,7 @@ and generates a Koch snowflake animation.
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
+from gif_writer import GlobalPaletteGIFWriter
 
 # %% KOCH SNOWFLAKE 
 def koch_line(start, end, factor):
@@ -256,6 +257,6 @@ def animate(i):
 # call the animator	 
 anim = animation.FuncAnimation(fig, animate, frames=total_frames + 64, interval=80, blit=True)
 # save the animation as mp4 video file 
-anim.save('koch_snowflake.gif',writer='imagemagick') 
+anim.save('koch_snowflake.gif', writer=GlobalPaletteGIFWriter(fps=1000/80, cmaps=(), colors=colors))
 
 # %% END
\ No newline at end of file
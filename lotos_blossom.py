@@ -8,6 +8,7 @@ date: Jul 19, 2023
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.animation import FuncAnimation
+from gif_writer import GlobalPaletteGIFWriter
 # %% LOTOS FLOWER (STATIC)
 def flower(num_petals):
     theta = np.linspace(0, 2.*np.pi, 1000)
@@ -46,7 +47,7 @@ def update(frame):
     return line,
 
 ani = FuncAnimation(fig, update, frames=range(101), init_func=init, blit=True)
-ani.save('images/lotos_flower.gif', writer='imagemagick')
+ani.save('images/lotos_flower.gif', writer=GlobalPaletteGIFWriter(fps=5, cmaps=(), colors=('deeppink',)))
 plt.close(fig)
 # %% LOTOS FLOWER WITH ANIMATION AND DESCRIPTION
 fig, ax = plt.subplots(figsize=(8, 8))
@@ -76,7 +77,7 @@ def update(frame):
 
 ani = FuncAnimation(fig, update, frames=range(101), init_func=init, blit=True)
 
-ani.save('images/lotos_flower_2.gif', writer='imagemagick')
+ani.save('images/lotos_flower_2.gif', writer=GlobalPaletteGIFWriter(fps=5, cmaps=(), colors=('deeppink', 'slategrey')))
 plt.close(fig)
 
 """ x_tmp, y_tmp = flower(20/100)
@@ -8,18 +8,14 @@ date: Aug 2, 2021
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from matplotlib.collections import PolyCollection
+from gif_writer import GlobalPaletteGIFWriter
+from ifs import expand, sierpinski_maps
 # %% SIERPINSKI TRIANGLE
 def sierpinski_triangle(ax, p1, p2, p3, depth=0):
-    if depth == 0:
-        ax.fill([p1[0], p2[0], p3[0]], [p1[1], p2[1], p3[1]], 'k')
-    else:
-        p12 = (p1 + p2) / 2
-        p23 = (p2 + p3) / 2
-        p31 = (p3 + p1) / 2
-        
-        sierpinski_triangle(ax, p1, p12, p31, depth - 1)
-        sierpinski_triangle(ax, p12, p2, p23, depth - 1)
-        sierpinski_triangle(ax, p31, p23, p3, depth - 1)
+    # all 3**depth triangles at once, drawn as a single collection:
+    triangles = expand(sierpinski_maps(p1, p2, p3), [p1, p2, p3], depth)
+    ax.add_collection(PolyCollection(triangles, color='k'))
 
 def update(frame):
     ax.clear()
@@ -48,6 +44,6 @@ num_frames = 11
 
 # create and save the animation:
 anim = FuncAnimation(fig, update, frames=num_frames, interval=500)
-anim.save('images/sierpinski_triangle_animation.gif', writer='imagemagick')
+anim.save('images/sierpinski_triangle_animation.gif', writer=GlobalPaletteGIFWriter(fps=2, cmaps=()))
 plt.show()
 # %% END
\ No newline at end of file
@@ -7,6 +7,8 @@ date: Aug 2, 2021
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from gif_writer import GlobalPaletteGIFWriter
+from curve_envelope import plot_envelope
 # %% TAKAGI FUNCTION (BLANCMANGE CURVE) 1D
 def phi(x):
     return np.abs(x - np.floor(x + 0.5)).astype(float)
@@ -28,18 +30,18 @@ def init():
     return line,
 
 def update(frame):
-    x = np.linspace(0, 1, 1000)
-    y = takagi(x, frame + 1)
-    line.set_data(x, y)
+    # 10**7 samples, reduced to a min/max envelope per pixel column of the
+    # saved GIF (dpi=300):
+    plot_envelope(ax, lambda x: takagi(x, frame + 1), 0, 1, 10**7, dpi=300, line=line)
     # Annotate current n:
     ax.texts[0].set_text(f'n = {frame:.2f}')
     ax.set_title(f'Takagi function (Blancmange curve) with n = {frame:.2f}')
     ax.set_xlabel('x')
     ax.set_ylabel('y')
         
-    return line
+    return line,
 
 # Set up the animation and save as GIF:
 anim = FuncAnimation(fig, update, frames=15, init_func=init, blit=True)
-anim.save('images/takagi_animation.gif', writer='pillow', dpi=300)
+anim.save('images/takagi_animation.gif', writer=GlobalPaletteGIFWriter(fps=5, cmaps=(), colors=('C0',)), dpi=300)
 plt.show()
\ No newline at end of file
@@ -0,0 +1,351 @@
+"""
+A local tile server for exploring the Mandelbrot and Julia sets.
+
+Tiles follow the slippy-map scheme /{z}/{x}/{y}.png: at zoom level z the
+square [-2, 2] x [-2, 2] of the complex plane is divided into 2**z x 2**z
+tiles, with tile (0, 0) in the upper left corner. Tiles are rendered by the
+escape-time renderers in escape_time.py (which pick float32, float64 or
+perturbation from the zoom level), in a thread or process pool.
+
+    python tile_server.py --port 8000
+
+then open http://127.0.0.1:8000/ for a minimal viewer (drag to pan, mouse
+wheel to zoom). URLs:
+
+    /mandelbrot/{z}/{x}/{y}.png[?iter=N]
+    /julia/{z}/{x}/{y}.png?c=-0.8,0.156[&iter=N]
+    /stats                       (cache hits and render latencies as JSON)
+
+Requests are handled by an asyncio server; concurrent requests for the same
+tile are coalesced into a single render. Rendered tiles are kept in an
+in-memory LRU cache and in an on-disk cache directory, which is trimmed to
+its size limit by evicting the least recently used files. Every response
+carries its render latency in the X-Render-Time-Ms header. The server only
+binds to localhost and needs no network access.
+"""
+# %% IMPORTS
+import argparse
+import asyncio
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal, localcontext
+from io import BytesIO
+import json
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import matplotlib as mpl
+from PIL import Image
+
+from escape_time import render
+# %% TILE RENDERING
+TILE_SIZE = 256
+MAX_ZOOM = 200
+WORLD = (Decimal(-2), Decimal(2))  # extent of the zoom level 0 tile on both axes
+
+def tile_bounds(z, x, y):
+    """Pixel-center bounds (x_min, x_max, y_min, y_max) of a tile, as Decimal
+    so that deep tiles keep their exact position.
+
+    :returns tuple: the bounds
+    """
+    with localcontext() as ctx:
+        # enough digits to resolve a pixel of zoom level z, plus a margin:
+        ctx.prec = int(z * 0.302) + 20
+        span = (WORLD[1] - WORLD[0]) / 2**z
+        half = span / (2 * TILE_SIZE)
+        x_min = WORLD[0] + x * span
+        y_max = WORLD[1] - y * span
+        return x_min + half, x_min + span - half, y_max - span + half, y_max - half
+
+def default_iterations(z):
+    """Iteration cap that grows with the zoom level."""
+    return 100 + 50 * z
+
+def render_tile(fractal, z, x, y, max_iter, c=None, cmap="magma"):
+    """Renders one tile to PNG bytes.
+
+    :param str fractal: 'mandelbrot' or 'julia'
+    :param complex c: the Julia constant
+    :returns tuple: (PNG bytes, render time in seconds)
+    """
+    start = time.perf_counter()
+    x_min, x_max, y_min, y_max = tile_bounds(z, x, y)
+    counts = render(x_min, x_max, y_min, y_max, TILE_SIZE, TILE_SIZE, max_iter,
+                    c=c if fractal == "julia" else None)
+    # color the exterior on a log scale, the interior black:
+    t = np.log1p(counts) / np.log1p(max_iter)
+    rgb = (mpl.colormaps[cmap](t)[..., :3] * 255).astype(np.uint8)
+    rgb[counts == max_iter] = 0
+    buf = BytesIO()
+    Image.fromarray(rgb[::-1]).save(buf, format="PNG")  # row 0 is the top
+    return buf.getvalue(), time.perf_counter() - start
+# %% CACHES
+class MemoryCache:
+    """An LRU cache of tiles in memory.
+
+    :param int max_tiles: maximum number of tiles kept
+    """
+    def __init__(self, max_tiles=1024):
+        self.max_tiles = max_tiles
+        self._tiles = OrderedDict()
+
+    def get(self, key):
+        data = self._tiles.get(key)
+        if data is not None:
+            self._tiles.move_to_end(key)
+        return data
+
+    def put(self, key, data):
+        self._tiles[key] = data
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+
+class DiskCache:
+    """An LRU cache of tiles in a directory, limited in total size.
+
+    The recency of the files is tracked by their modification time, which
+    is refreshed on every hit, so the order survives a restart.
+
+    :param str directory: the cache directory
+    :param int max_bytes: maximum total size of the cached files
+    """
+    def __init__(self, directory="tile_cache", max_bytes=512 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        files = [(entry.stat().st_mtime, entry.name, entry.stat().st_size)
+                 for entry in os.scandir(directory) if entry.name.endswith(".png")]
+        self._files = OrderedDict((name, size) for _, name, size in sorted(files))
+        self._bytes = sum(self._files.values())
+
+    @staticmethod
+    def _name(key):
+        return "_".join(str(part) for part in key).replace("/", "-") + ".png"
+
+    def get(self, key):
+        name = self._name(key)
+        if name not in self._files:
+            return None
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self._bytes -= self._files.pop(name)
+            return None
+        os.utime(path)
+        self._files.move_to_end(name)
+        return data
+
+    def put(self, key, data):
+        name = self._name(key)
+        tmp = os.path.join(self.directory, name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, os.path.join(self.directory, name))
+        self._bytes += len(data) - self._files.pop(name, 0)
+        self._files[name] = len(data)
+        while self._bytes > self.max_bytes and len(self._files) > 1:
+            old, size = self._files.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except OSError:
+                pass
+# %% SERVER
+class TileServer:
+    """Serves escape-time tiles over HTTP on localhost.
+
+    :param int workers: size of the render pool
+    :param bool processes: render in processes instead of threads
+    :param MemoryCache memory_cache: the in-memory cache
+    :param DiskCache disk_cache: the on-disk cache (None to disable)
+    """
+    def __init__(self, workers=None, processes=False, memory_cache=None, disk_cache=None):
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self.pool = pool(max_workers=workers)
+        self.memory_cache = memory_cache if memory_cache is not None else MemoryCache()
+        self.disk_cache = disk_cache
+        self._pending = {}  # tile key -> future of the render in progress
+        self.stats = {"requests": 0, "memory_hits": 0, "disk_hits": 0, "coalesced": 0,
+                      "renders": 0, "render_ms": deque(maxlen=10000)}
+
+    async def get_tile(self, key):
+        """Returns (PNG bytes, source, render time in ms) of a tile.
+
+        :param tuple key: (fractal, c, max_iter, z, x, y)
+        """
+        self.stats["requests"] += 1
+        data = self.memory_cache.get(key)
+        if data is not None:
+            self.stats["memory_hits"] += 1
+            return data, "memory", 0.0
+        if self.disk_cache is not None:
+            data = self.disk_cache.get(key)
+            if data is not None:
+                self.stats["disk_hits"] += 1
+                self.memory_cache.put(key, data)
+                return data, "disk", 0.0
+
+        # coalesce duplicate requests of a tile that is being rendered:
+        future = self._pending.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            data, seconds = await asyncio.shield(future)
+            return data, "coalesced", 1000 * seconds
+
+        fractal, c, max_iter, z, x, y = key
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, render_tile, fractal, z, x, y, max_iter, c)
+        self._pending[key] = future
+        try:
+            data, seconds = await future
+        finally:
+            del self._pending[key]
+        self.stats["renders"] += 1
+        self.stats["render_ms"].append(1000 * seconds)
+        self.memory_cache.put(key, data)
+        if self.disk_cache is not None:
+            self.disk_cache.put(key, data)
+        print(f"rendered {fractal} z={z} x={x} y={y} iter={max_iter} in {1000 * seconds:.1f} ms")
+        return data, "render", 1000 * seconds
+
+    def _stats_json(self):
+        ms = np.array(self.stats["render_ms"]) if self.stats["render_ms"] else np.zeros(1)
+        stats = {k: v for k, v in self.stats.items() if k != "render_ms"}
+        stats.update(render_ms_mean=float(ms.mean()), render_ms_p50=float(np.percentile(ms, 50)),
+                     render_ms_p95=float(np.percentile(ms, 95)), pending=len(self._pending))
+        return json.dumps(stats).encode()
+
+    def _parse_tile(self, path, query):
+        parts = path.strip("/").split("/")
+        if len(parts) != 4 or parts[0] not in ("mandelbrot", "julia") \
+                or not parts[3].endswith(".png"):
+            raise LookupError("expected /{mandelbrot|julia}/{z}/{x}/{y}.png")
+        fractal = parts[0]
+        try:
+            z, x, y = int(parts[1]), int(parts[2]), int(parts[3][:-4])
+        except ValueError:
+            raise LookupError("tile coordinates must be integers") from None
+        if not (0 <= z <= MAX_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z):
+            raise LookupError("tile out of range")
+        max_iter = int(query.get("iter", [default_iterations(z)])[0])
+        if max_iter <= 0:
+            raise ValueError("iter must be positive")
+        c = None
+        if fractal == "julia":
+            re, im = (float(v) for v in query.get("c", ["-0.8,0.156"])[0].split(","))
+            c = complex(re, im)
+        return fractal, c, max_iter, z, x, y
+
+    async def handle(self, reader, writer):
+        """Answers one HTTP request."""
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # headers are not needed
+            method, target, _ = request.decode("latin-1").split(" ", 2)
+            url = urlsplit(target)
+            headers = {}
+            if method != "GET":
+                status, body, ctype = "405 Method Not Allowed", b"", "text/plain"
+            elif url.path in ("/", "/index.html"):
+                status, body, ctype = "200 OK", VIEWER_HTML.encode(), "text/html"
+            elif url.path == "/stats":
+                status, body, ctype = "200 OK", self._stats_json(), "application/json"
+            else:
+                try:
+                    key = self._parse_tile(url.path, parse_qs(url.query))
+                except LookupError as err:
+                    status, body, ctype = "404 Not Found", str(err).encode(), "text/plain"
+                except ValueError as err:
+                    status, body, ctype = "400 Bad Request", str(err).encode(), "text/plain"
+                else:
+                    body, source, ms = await self.get_tile(key)
+                    status, ctype = "200 OK", "image/png"
+                    headers = {"X-Cache": source, "X-Render-Time-Ms": f"{ms:.1f}",
+                               "Cache-Control": "max-age=3600"}
+            head = [f"HTTP/1.1 {status}", f"Content-Type: {ctype}",
+                    f"Content-Length: {len(body)}", "Connection: close"]
+            head += [f"{k}: {v}" for k, v in headers.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        except (ValueError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"serving tiles on http://{host}:{port}/")
+        async with server:
+            await server.serve_forever()
+# %% VIEWER
+VIEWER_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Escape-time tiles</title>
+<style>html,body{margin:0;height:100%;overflow:hidden;background:#000}
+#map{position:absolute;inset:0;cursor:grab}#map img{position:absolute;width:256px;height:256px}
+#info{position:absolute;left:8px;top:8px;color:#fff;font:13px monospace}</style></head>
+<body><div id="map"></div><div id="info"></div><script>
+const q = new URLSearchParams(location.search), fractal = q.get("fractal") || "mandelbrot";
+const extra = fractal === "julia" ? "?c=" + (q.get("c") || "-0.8,0.156") : "";
+let z = 1, cx = 1, cy = 1;  // view center in tile units of level z
+const map = document.getElementById("map"), info = document.getElementById("info");
+function draw() {
+  map.innerHTML = "";
+  const w = map.clientWidth, h = map.clientHeight, n = 2 ** z;
+  const x0 = cx - w / 512, y0 = cy - h / 512;
+  for (let ty = Math.floor(y0); ty < y0 + h / 256; ty++)
+    for (let tx = Math.floor(x0); tx < x0 + w / 256; tx++) {
+      if (tx < 0 || ty < 0 || tx >= n || ty >= n) continue;
+      const img = document.createElement("img");
+      img.src = `/${fractal}/${z}/${tx}/${ty}.png${extra}`;
+      img.style.left = (tx - x0) * 256 + "px"; img.style.top = (ty - y0) * 256 + "px";
+      map.appendChild(img);
+    }
+  const s = 4 / n;
+  info.textContent = `z=${z}  center=${(-2 + cx * s).toPrecision(12)} ${(2 - cy * s).toPrecision(12)}i`;
+}
+let drag = null;
+map.onmousedown = e => { drag = [e.clientX, e.clientY]; };
+onmouseup = () => { drag = null; };
+onmousemove = e => {
+  if (!drag) return;
+  cx -= (e.clientX - drag[0]) / 256; cy -= (e.clientY - drag[1]) / 256;
+  drag = [e.clientX, e.clientY]; draw();
+};
+map.onwheel = e => {
+  e.preventDefault();
+  // keep the point under the cursor in place:
+  const dx = (e.clientX - map.clientWidth / 2) / 256, dy = (e.clientY - map.clientHeight / 2) / 256;
+  const f = e.deltaY < 0 ? 2 : 0.5;
+  if (f < 1 && z === 0) return;
+  z += f > 1 ? 1 : -1;
+  cx = (cx + dx) * f - dx; cy = (cy + dy) * f - dy;
+  draw();
+};
+onresize = draw; draw();
+</script></body></html>
+"""
+# %% MAIN
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="size of the render pool")
+    parser.add_argument("--processes", action="store_true", help="render in processes")
+    parser.add_argument("--memory-tiles", type=int, default=1024)
+    parser.add_argument("--cache-dir", default="tile_cache")
+    parser.add_argument("--disk-mb", type=float, default=512, help="0 disables the disk cache")
+    args = parser.parse_args()
+
+    disk = DiskCache(args.cache_dir, int(args.disk_mb * 2**20)) if args.disk_mb > 0 else None
+    server = TileServer(args.workers, args.processes, MemoryCache(args.memory_tiles), disk)
+    try:
+        asyncio.run(server.serve("127.0.0.1", args.port))
+    except KeyboardInterrupt:
+        pass
+# %% END
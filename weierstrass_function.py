@@ -7,37 +7,38 @@ date: Aug 2, 2021
 # %% IMPORTS
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation, PillowWriter
+from matplotlib.animation import FuncAnimation
 from mpl_toolkits.mplot3d import Axes3D
+from gif_writer import GlobalPaletteGIFWriter
+from curve_envelope import plot_envelope
 # %% WEIERSTRASS FUNCTION 1D
 # setting the ranges for calculation: 
 b_start = -3
 b_stop = 3
-steps = 1000
-
-# b for x axis. Here you can change start and stop points:
-b = np.arange(b_start, b_stop, ((b_stop-b_start)/steps))
+steps = 2**20  # samples per frame; reduced to a min/max envelope per pixel column
 
 # defining the weierstrass function:
 def weierstrass(x, Nvar, b):
-    ws = np.zeros(steps)
-    for n in range(0, Nvar):
+    ws = np.zeros_like(x, dtype=float)
+    # terms beyond n = 53 are below the float64 resolution (|term| <= 2**-n):
+    for n in range(0, min(Nvar, 54)):
         ws = ws + np.cos(b**n*np.pi*x)/2**n
     return ws
 
 # plot/animate:
 fig, ax = plt.subplots()
 ax.set_xlim(b_start, b_stop)
-line, = ax.plot(b, weierstrass(b, 500, 0.1))
+ax.set_ylim(-2.1, 2.1)  # |W(x)| <= sum(1/2**n) = 2
+line = plot_envelope(ax, lambda x: weierstrass(x, 500, 0.1), b_start, b_stop, steps)
 ax.annotate(f'b = {0.1:.2f}', (0.05, 0.95), xycoords='axes fraction')
 
 def update(b):
-    line.set_ydata(weierstrass(b, 500, b))
+    plot_envelope(ax, lambda x: weierstrass(x, 500, b), b_start, b_stop, steps, line=line)
     ax.texts[0].set_text(f'b = {b:.2f}')
     return line,
 
 ani = FuncAnimation(fig, update, frames=np.linspace(0.1, 4, 100), interval=50)
-writer = PillowWriter(fps=15)
+writer = GlobalPaletteGIFWriter(fps=15, cmaps=(), colors=('C0',))
 ani.save('images/weierstrass_function.gif', writer=writer)
 plt.show()
 # %% WEIERSTRASS FUNCTION 2D (STATIC)
@@ -99,6 +100,6 @@ def update(b):
     return surf,
 
 ani = FuncAnimation(fig, update, frames=np.linspace(1, 20, 200), interval=100)
-writer = PillowWriter(fps=10)
+writer = GlobalPaletteGIFWriter(fps=10, cmaps=('viridis',))
 ani.save('images/weierstrass_fractal.gif', writer=writer)
 plt.show()
\ No newline at end of file